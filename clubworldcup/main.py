@@ -1,18 +1,23 @@
-import random
-import json
 import re
 import pandas as pd
 import io
+import os
+import json
+import hashlib
 import numpy as np
-from collections import defaultdict
+import argparse
+from multiprocessing import Pool, cpu_count
 from tqdm.auto import tqdm
 
 # --- Configuration ---
-NUM_SIMULATIONS = 50  # Define the number of Monte Carlo simulations to run
+NUM_SIMULATIONS = 50  # Default number of Monte Carlo simulations to run (--simulations)
 # --- IMPORTANT: Set your player data CSV file path here ---
 # Make sure 'player_data.csv' is in the same directory as this script,
 # or provide the full path, e.g., 'C:/Users/YourUser/Documents/player_data.csv'
 PLAYER_CSV_FILE_PATH = 'clubworldcup/player_data.csv'
+# Averaged streamy scores are cached here between runs (see set_initial_streamy_scores)
+STREAMY_CACHE_PATH = 'clubworldcup/streamy_scores.cache.json' # Safe to delete; rebuilt on the next run
+STREAMY_CACHE_MAX_ENTRIES = 8 # Oldest cached averages are evicted beyond this
 
 # --- Initial Team Data ---
 # This data structure is designed to be easily extensible.
@@ -92,14 +97,126 @@ def generate_all_group_matches_template(teams):
                 matches.append(match)
     return matches
 
-# This template is used to create deep copies for each simulation
+# This template describes every group match and any pre-set results
 all_group_matches_template = generate_all_group_matches_template(initial_teams_data)
 
+# --- Tournament State Arrays ---
+# Simulations do not copy the team and match dicts. The initial tournament state is packed
+# once into a read-only int array (the snapshot); each simulation starts from a copy of it
+# and works on two views: team stats (teams x TEAM_STAT_FIELDS) and match results
+# (matches x MATCH_RESULT_FIELDS).
+TEAM_STAT_FIELDS = ['matchesPlayed', 'wins', 'draws', 'losses', 'goalsFor', 'goalsAgainst', 'points']
+MATCH_RESULT_FIELDS = ['played', 'homeGoals', 'awayGoals']
+MP, WINS, DRAWS, LOSSES, GF, GA, PTS = range(len(TEAM_STAT_FIELDS))
+PLAYED, HOME_GOALS, AWAY_GOALS = range(len(MATCH_RESULT_FIELDS))
+
+TEAM_NAMES = [team['name'] for team in initial_teams_data]
+TEAM_INDEX = {team['id']: idx for idx, team in enumerate(initial_teams_data)}
+GROUPS = sorted(set(team['group'] for team in initial_teams_data))
+GROUP_MEMBERS = {group: [idx for idx, team in enumerate(initial_teams_data) if team['group'] == group] for group in GROUPS}
+MATCH_HOME = np.array([TEAM_INDEX[match['homeTeamId']] for match in all_group_matches_template], dtype=np.intp)
+MATCH_AWAY = np.array([TEAM_INDEX[match['awayTeamId']] for match in all_group_matches_template], dtype=np.intp)
+
+def build_initial_state(teams, matches):
+    """Packs team stats and match results into one flat, read-only int array."""
+    team_block = [[team[field] for field in TEAM_STAT_FIELDS] for team in teams]
+    match_block = [[int(match['played']), match['homeGoals'] or 0, match['awayGoals'] or 0] for match in matches]
+    state = np.concatenate([np.ravel(team_block), np.ravel(match_block)]).astype(np.int32)
+    state.flags.writeable = False
+    return state
+
+def state_views(state):
+    """
+    Splits a state array into (team stats, match results) views sharing its memory.
+    Leading dimensions are kept, so a (sims x state length) batch gives per-simulation views.
+    """
+    split = len(TEAM_NAMES) * len(TEAM_STAT_FIELDS)
+    batch = state.shape[:-1]
+    return (state[..., :split].reshape(batch + (len(TEAM_NAMES), -1)),
+            state[..., split:].reshape(batch + (-1, len(MATCH_RESULT_FIELDS))))
+
+INITIAL_STATE = build_initial_state(initial_teams_data, all_group_matches_template)
+INITIAL_TEAM_STATS, INITIAL_MATCH_RESULTS = state_views(INITIAL_STATE)
+
+def match_incidence(team_idx):
+    """One-hot (matches x teams) matrix: entry [m, t] is 1 when team t plays in match m."""
+    onehot = np.zeros((len(team_idx), len(TEAM_NAMES)), dtype=np.int32)
+    onehot[np.arange(len(team_idx)), team_idx] = 1
+    return onehot
+
+UNPLAYED_MATCHES = np.flatnonzero(INITIAL_MATCH_RESULTS[:, PLAYED] == 0) # Only these are simulated
+UNPLAYED_HOME_ONEHOT = match_incidence(MATCH_HOME[UNPLAYED_MATCHES])
+UNPLAYED_AWAY_ONEHOT = match_incidence(MATCH_AWAY[UNPLAYED_MATCHES])
+
 # --- Player Data Loading ---
+# Explicit schema for player_data.csv. Text columns stay as strings; every stat column the model
+# reads is coerced to float once, here, with unparseable values counted as 0.
+PLAYER_TEXT_COLUMNS = ['Player', 'Nation', 'Pos', 'Teams', 'Age']
+PLAYER_NUMERIC_COLUMNS = ['Rating', 'Goals', 'Assists', 'Gls', 'Ast']
+
+# The cleaned frame is cached next to the CSV as Feather when pyarrow is available, else as a pickle
+try:
+    import pyarrow
+    PLAYER_CACHE_FORMAT = 'feather'
+except ImportError:
+    PLAYER_CACHE_FORMAT = 'pickle'
+PLAYER_CACHE_VERSION = 1 # Bump whenever the schema or clean_player_data changes, so old caches are rebuilt
+
+def clean_player_data(df):
+    """Coerces the stat columns the model reads to float, counting NaN or invalid values as 0."""
+    for col in PLAYER_NUMERIC_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float)
+    return df
+
+def file_sha256(path):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def player_cache_paths(csv_path):
+    """Returns (cached frame path, sidecar key path) for a player CSV."""
+    stem = os.path.splitext(csv_path)[0]
+    return f"{stem}.cache.{PLAYER_CACHE_FORMAT}", f"{stem}.cache.json"
+
 def load_player_data(csv_path):
-    """Load player data from CSV file path and return as DataFrame."""
+    """
+    Load player data from CSV file path and return the cleaned DataFrame.
+    The cleaned frame is cached on disk, keyed by PLAYER_CACHE_VERSION and the CSV's mtime and SHA-256:
+    an unchanged mtime reuses the cache directly, and a changed mtime with unchanged contents only
+    refreshes the key.
+    """
     try:
-        df = pd.read_csv(csv_path)
+        mtime = os.path.getmtime(csv_path)
+        cache_path, key_path = player_cache_paths(csv_path)
+        try:
+            with open(key_path) as f:
+                key = json.load(f)
+            if (key.get('version') == PLAYER_CACHE_VERSION and key['format'] == PLAYER_CACHE_FORMAT
+                    and os.path.exists(cache_path)):
+                if key['mtime'] != mtime and key['sha256'] == file_sha256(csv_path):
+                    key['mtime'] = mtime # Touched but unchanged
+                    with open(key_path, 'w') as f:
+                        json.dump(key, f)
+                if key['mtime'] == mtime:
+                    return pd.read_feather(cache_path) if PLAYER_CACHE_FORMAT == 'feather' else pd.read_pickle(cache_path)
+        except (OSError, ValueError, KeyError):
+            pass # Missing or unreadable cache: rebuild it below
+
+        df = clean_player_data(pd.read_csv(csv_path, dtype={col: str for col in PLAYER_TEXT_COLUMNS}))
+        try:
+            if PLAYER_CACHE_FORMAT == 'feather':
+                df.to_feather(cache_path)
+            else:
+                df.to_pickle(cache_path)
+            with open(key_path, 'w') as f:
+                json.dump({'version': PLAYER_CACHE_VERSION, 'mtime': mtime, 'sha256': file_sha256(csv_path),
+                           'format': PLAYER_CACHE_FORMAT}, f)
+        except OSError as e:
+            print(f"Warning: Could not cache player data next to '{csv_path}': {e}")
         return df
     except FileNotFoundError:
         print(f"Error: Player data CSV file not found at '{csv_path}'. Please ensure the path is correct.")
@@ -144,265 +261,474 @@ TEAM_COUNTRY_MAP = {
     # Add more mappings as needed
 }
 
-# Load player data
-player_df = load_player_data(PLAYER_CSV_FILE_PATH)
+# --- Team Alias Index ---
+# Player rows list their clubs as free text in the 'Teams' column. Every alias is normalized once,
+# and each distinct club string is resolved once and cached, so matching a large squad file
+# costs one dict lookup per player instead of a substring scan over every alias.
+def normalize_team_name(name):
+    """Normalizes a team name or alias for matching: spaces removed, lower case."""
+    return str(name).replace(' ', '').lower()
+
+def build_alias_index(teams):
+    """Maps every normalized team name and TEAM_COUNTRY_MAP alias to the positions of its teams."""
+    alias_index = {}
+    for position, team in enumerate(teams):
+        for alias in [team['name']] + TEAM_COUNTRY_MAP.get(team['name'], []):
+            alias_index.setdefault(normalize_team_name(alias), set()).add(position)
+    return alias_index
+
+def resolve_team_token(token, alias_index, token_cache):
+    """
+    Returns the positions of the teams matched by one normalized 'Teams' token: every team with an
+    alias contained in it. The substring scan runs once per unseen token; repeats hit token_cache.
+    """
+    if token not in token_cache:
+        token_cache[token] = frozenset(position for alias, positions in alias_index.items()
+                                       if alias in token for position in positions)
+    return token_cache[token]
+
+def resolve_player_teams(teams_column, alias_index):
+    """
+    Resolves a 'Teams' column to (player row, team position) pairs.
+    Each distinct cell is split, normalized and resolved only once.
+    """
+    codes, uniques = pd.factorize(np.array([str(cell) for cell in teams_column], dtype=object)) # NaN -> 'nan', never code -1
+    token_cache = {}
+    cell_teams = [sorted(set().union(*(resolve_team_token(normalize_team_name(t), alias_index, token_cache)
+                                       for t in cell.split(','))))
+                  for cell in uniques]
+    rows = [row for row, code in enumerate(codes) for _ in cell_teams[code]]
+    positions = [position for code in codes for position in cell_teams[code]]
+    return np.array(rows, dtype=np.intp), np.array(positions, dtype=np.intp)
+
+# --- Team -> Player Aggregates Index ---
+def build_team_player_index(teams, player_df):
+    """
+    Matches players to each team once and returns {team id: (mean rating, goals, assists)}.
+    Only the streamy-score weights change between runs, so these aggregates are built at
+    load time and reused by every run.
+    """
+    teams_column = player_df['Teams'] if 'Teams' in player_df else pd.Series('nan', index=player_df.index)
+    rows, positions = resolve_player_teams(teams_column, build_alias_index(teams))
+    # Stat columns were coerced to float by load_player_data
+    numeric = {col: player_df[col].to_numpy(dtype=float) for col in PLAYER_NUMERIC_COLUMNS if col in player_df}
+    goals_col = 'Goals' if 'Goals' in numeric else 'Gls' if 'Gls' in numeric else None
+    assists_col = 'Assists' if 'Assists' in numeric else 'Ast' if 'Ast' in numeric else None
+
+    # Per-team sums over matched (player, team) pairs
+    def team_sums(values):
+        return np.bincount(positions, weights=values[rows], minlength=len(teams))
+    player_counts = np.bincount(positions, minlength=len(teams))
+    rating_sums = team_sums(numeric['Rating']) if 'Rating' in numeric else np.zeros(len(teams))
+    goal_sums = team_sums(numeric[goals_col]) if goals_col else np.zeros(len(teams))
+    assist_sums = team_sums(numeric[assists_col]) if assists_col else np.zeros(len(teams))
+
+    index = {}
+    for position, team in enumerate(teams):
+        # A team without matched players contributes 0 for every player aggregate
+        player_score = float(rating_sums[position] / player_counts[position]) if player_counts[position] else 0.0
+        index[team['id']] = (player_score, float(goal_sums[position]), float(assist_sums[position]))
+    return index
 
 # --- Streamy Score Calculation (Randomized Weights Averaged Over Simulations) ---
-def compute_team_streamy_score_with_weights(team, player_df, weights):
-    """
-    Compute a 'Streamy Score' for a team using provided weights (which sum to 1),
-    and scale the result to be out of 10.
-    """
-    def normalize_name(name):
-        return str(name).replace(' ', '').lower()
-    team_name_norm = normalize_name(team['name'])
-    possible_names = [normalize_name(team['name'])]
-    if team['name'] in TEAM_COUNTRY_MAP:
-        possible_names += [normalize_name(n) for n in TEAM_COUNTRY_MAP[team['name']]]
-    def player_team_match(row):
-        teams = [normalize_name(t) for t in str(row['Teams']).split(',')]
-        return any(n in teams or any(n in t for t in teams) for n in possible_names)
-    team_players = player_df[player_df.apply(player_team_match, axis=1)]
-    for col in ['Rating', 'Goals', 'Assists', 'Gls', 'Ast']:
-        if col in team_players:
-            team_players[col] = pd.to_numeric(team_players[col], errors='coerce').fillna(0)
-    player_score = team_players['Rating'].mean() if 'Rating' in team_players else 0
-    player_goals = (
-        team_players['Goals'].sum() if 'Goals' in team_players else
-        team_players['Gls'].sum() if 'Gls' in team_players else 0
-    )
-    player_assists = (
-        team_players['Assists'].sum() if 'Assists' in team_players else
-        team_players['Ast'].sum() if 'Ast' in team_players else 0
-    )
-    if team_players.empty:
-        pass  # Don't print warnings during 5000x runs
+# Order of the five streamy-score terms, shared by weight vectors and team feature vectors
+STREAMY_WEIGHT_KEYS = ['sofa', 'player', 'goals', 'assists', 'perf']
+
+def team_feature_vector(team, player_index):
+    """Returns the five streamy-score terms for a team, in STREAMY_WEIGHT_KEYS order."""
+    player_score, player_goals, player_assists = player_index.get(team['id'], (0.0, 0.0, 0.0))
     perf_score = (
         team['points'] * 2 +
         (team['goalsFor'] - team['goalsAgainst']) +
         team['wins'] * 1.5 +
         team['draws'] * 0.5
     )
-    # Weighted sum, then scale to 10
-    raw_score = (
-        weights['sofa'] * team['sofaScoreAverage'] +
-        weights['player'] * player_score +
-        weights['goals'] * player_goals +
-        weights['assists'] * player_assists +
-        weights['perf'] * perf_score
-    )
-    # Scale to 10 (assuming max possible is 10, min is 0)
-    return min(max(raw_score, 0), 10)
+    return np.array([team['sofaScoreAverage'], player_score, player_goals, player_assists, perf_score])
+
+def draw_streamy_weights(num_runs, rng=None):
+    """
+    Draws one random weight vector per run, each summing to 1: returns a (runs x 5) matrix.
+    Each weight is a uniform draw normalized by the row total, as in the original per-run loop.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    raw_weights = rng.random((num_runs, len(STREAMY_WEIGHT_KEYS)))
+    return raw_weights / raw_weights.sum(axis=1, keepdims=True)
+
+def compute_streamy_scores(weight_matrix, feature_matrix):
+    """
+    Compute 'Streamy Scores' for every (run, team) pair in one matrix product:
+    (runs x 5) weights @ (teams x 5).T features -> (runs x teams) scores, clipped to [0, 10].
+    """
+    return np.clip(weight_matrix @ feature_matrix.T, 0, 10)
 
 def compute_team_streamy_score(team, player_df):
     # Fallback: just use SofaScoreAverage or default 7.0
     return team.get('sofaScoreAverage', 7.0) or 7.0
 
-# --- Calculate Streamy Score for each team by averaging over 5000 random weight runs ---
-if not player_df.empty:
-    print("\nCalculating Streamy Scores for all teams (averaged over random weights)...")
-    team_streamy_scores = {team['id']: [] for team in initial_teams_data}
-    for _ in tqdm(range(NUM_SIMULATIONS), desc="Streamy Score Weight Runs"):
-        # Generate random weights for each stat, sum to 1
-        w = [random.random() for _ in range(5)]
-        wsum = sum(w)
-        weights = {
-            'sofa': w[0]/wsum,
-            'player': w[1]/wsum,
-            'goals': w[2]/wsum,
-            'assists': w[3]/wsum,
-            'perf': w[4]/wsum
-        }
-        for team in initial_teams_data:
-            score = compute_team_streamy_score_with_weights(team, player_df, weights)
-            team_streamy_scores[team['id']].append(score)
-    # Average the scores for each team
-    for team in initial_teams_data:
-        scores = team_streamy_scores[team['id']]
-        team['streamyScore'] = sum(scores) / len(scores) if scores else 0
-else:
-    print("Warning: Player data not loaded. Streamy Scores will not be accurately computed. Using only SofaScoreAverage (or default 7.0 if zero games played) for match prediction.")
-    for team in initial_teams_data:
-        team['streamyScore'] = compute_team_streamy_score(team, pd.DataFrame())
+def build_team_features(teams, player_df):
+    """Returns the (teams x 5) streamy feature matrix; player aggregates are 0 without player data."""
+    player_index = build_team_player_index(teams, player_df) if not player_df.empty else {}
+    return np.array([team_feature_vector(team, player_index) for team in teams])
+
+# Streamy feature matrix used by the simulations. Set in the main process and, through the Pool
+# initializer, in every worker, so nothing has to be recomputed when a worker imports this module.
+TEAM_FEATURES = None
+
+def install_team_features(feature_matrix):
+    """Pool initializer: installs the streamy feature matrix for this process."""
+    global TEAM_FEATURES
+    TEAM_FEATURES = feature_matrix
+
+# --- Calculate Streamy Score for each team by averaging over random weight runs ---
+def streamy_cache_key(teams, csv_path, num_runs):
+    """
+    Hashes everything the averaged streamy scores depend on: the team data, the player CSV's
+    contents, the team alias map and the number of weight runs.
+    """
+    digest = hashlib.sha256()
+    team_data = [{k: v for k, v in team.items() if k != 'streamyScore'} for team in teams]
+    digest.update(json.dumps([team_data, TEAM_COUNTRY_MAP, num_runs], sort_keys=True).encode())
+    digest.update(file_sha256(csv_path).encode())
+    return digest.hexdigest()
+
+def read_streamy_cache(cache_path):
+    """Returns the {key: averaged scores} cache, or an empty dict if it is missing or unreadable."""
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def set_initial_streamy_scores(teams, player_df, feature_matrix, num_runs, rng=None,
+                               csv_path=PLAYER_CSV_FILE_PATH, cache_path=STREAMY_CACHE_PATH):
+    """
+    Sets each team's 'streamyScore' to its average over num_runs random weight runs.
+    The averages are cached on disk by streamy_cache_key and reused while the inputs are unchanged;
+    the cache keeps the STREAMY_CACHE_MAX_ENTRIES most recently computed entries.
+    """
+    if not player_df.empty:
+        key = streamy_cache_key(teams, csv_path, num_runs)
+        cache = read_streamy_cache(cache_path)
+        average_scores = cache.get(key)
+        if average_scores is not None and len(average_scores) == len(teams):
+            print("\nUsing cached Streamy Scores (inputs unchanged).")
+        else:
+            print("\nCalculating Streamy Scores for all teams (averaged over random weights)...")
+            # Every run's score for every team in one matrix product, averaged per team
+            average_scores = compute_streamy_scores(draw_streamy_weights(num_runs, rng), feature_matrix).mean(axis=0).tolist()
+            cache.pop(key, None)
+            cache[key] = average_scores
+            for stale_key in list(cache)[:-STREAMY_CACHE_MAX_ENTRIES]: # JSON objects keep insertion order
+                del cache[stale_key]
+            try:
+                with open(cache_path, 'w') as f:
+                    json.dump(cache, f)
+            except OSError as e:
+                print(f"Warning: Could not write Streamy Score cache '{cache_path}': {e}")
+    else:
+        print("Warning: Player data not loaded. Streamy Scores will not be accurately computed. Using only SofaScoreAverage (or default 7.0 if zero games played) for match prediction.")
+        average_scores = [compute_team_streamy_score(team, pd.DataFrame()) for team in teams]
+    for team, avg_score in zip(teams, average_scores):
+        team['streamyScore'] = float(avg_score)
 
 # --- Match Outcome Prediction ---
-def predict_match_outcome(team_a, team_b):
+# The five strength-difference bands and their goal distributions, compiled into lookup tables.
+# Band order: strong away favorite, moderate away, even, moderate home, strong home favorite.
+EVEN_BAND = 2
+GOAL_VALUES = np.array([
+    [[0, 1, 0], [2, 3, 4]], # Strong favorite away
+    [[0, 1, 2], [1, 2, 3]], # Moderate favorite away
+    [[0, 1, 2], [0, 1, 2]], # Evenly matched or slight difference
+    [[1, 2, 3], [0, 1, 2]], # Moderate favorite home
+    [[2, 3, 4], [0, 1, 0]], # Strong favorite home
+]) # (band, home/away, outcome); [0, 1] distributions are padded with a zero-weight outcome
+GOAL_WEIGHTS = np.array([
+    [[0.7, 0.3, 0.0], [0.4, 0.4, 0.2]],
+    [[0.5, 0.3, 0.2], [0.4, 0.4, 0.2]],
+    [[0.3, 0.4, 0.3], [0.3, 0.4, 0.3]],
+    [[0.4, 0.4, 0.2], [0.5, 0.3, 0.2]],
+    [[0.4, 0.4, 0.2], [0.7, 0.3, 0.0]],
+])
+# Cumulative weights and totals, accumulated in the same order as random.choices does
+GOAL_CUM_WEIGHTS = np.cumsum(GOAL_WEIGHTS, axis=-1)
+GOAL_TOTALS = GOAL_CUM_WEIGHTS[..., -1].copy()
+# Padding outcomes can never be drawn
+GOAL_CUM_WEIGHTS[GOAL_WEIGHTS == 0] = np.inf
+
+def strength_band(strength_diff):
+    """
+    Maps strength differences to band indices (0-4). Thresholds are strict on both sides,
+    so a difference of exactly +/-0.5 or +/-1.5 falls in the less lopsided band.
+    """
+    return (EVEN_BAND + (strength_diff > 0.5).astype(np.intp) + (strength_diff > 1.5)
+            - (strength_diff < -0.5) - (strength_diff < -1.5))
+
+def sample_goals(band, side, u):
     """
-    Predicts the goals for a match based on the teams' 'streamyScore'.
+    Inverse-CDF goal draw: the outcome chosen is the first whose cumulative weight exceeds
+    u * total, i.e. bisect_right on the cumulative weights, as in random.choices.
+    """
+    cum_weights = GOAL_CUM_WEIGHTS[band, side]
+    total = GOAL_TOTALS[band, side]
+    outcome = (cum_weights <= (u * total)[..., None]).sum(axis=-1)
+    return GOAL_VALUES[band, side, outcome]
+
+def predict_match_outcome(a_strength, b_strength, rng):
+    """
+    Predicts the goals for a batch of matches based on the teams' streamy scores.
+    a_strength and b_strength are broadcastable arrays; returns (home goals, away goals) arrays.
     Adds a random element to simulate game variability.
     """
-    # Use the pre-calculated streamyScore as the basis for match prediction
-    a_strength = team_a['streamyScore']
-    b_strength = team_b['streamyScore']
+    a_strength, b_strength = np.broadcast_arrays(np.asarray(a_strength, dtype=float), np.asarray(b_strength, dtype=float))
+    u = rng.random((4,) + a_strength.shape)
 
     # Add randomness to the strength for a single match to simulate variability
-    a_effective_strength = a_strength + (random.random() - 0.5) * 1.0 # Smaller random range
-    b_effective_strength = b_strength + (random.random() - 0.5) * 1.0
-
-    strength_diff = a_effective_strength - b_effective_strength
-    
-    home_goals, away_goals = 0, 0
+    a_effective_strength = a_strength + (u[0] - 0.5) * 1.0 # Smaller random range
+    b_effective_strength = b_strength + (u[1] - 0.5) * 1.0
 
     # Probabilistic goal scoring based on strength difference
-    if strength_diff > 1.5:  # Strong favorite home
-        home_goals = random.choices([2, 3, 4], weights=[0.4, 0.4, 0.2])[0]
-        away_goals = random.choices([0, 1], weights=[0.7, 0.3])[0]
-    elif strength_diff < -1.5: # Strong favorite away
-        home_goals = random.choices([0, 1], weights=[0.7, 0.3])[0]
-        away_goals = random.choices([2, 3, 4], weights=[0.4, 0.4, 0.2])[0]
-    elif strength_diff > 0.5: # Moderate favorite home
-        home_goals = random.choices([1, 2, 3], weights=[0.4, 0.4, 0.2])[0]
-        away_goals = random.choices([0, 1, 2], weights=[0.5, 0.3, 0.2])[0]
-    elif strength_diff < -0.5: # Moderate favorite away
-        home_goals = random.choices([0, 1, 2], weights=[0.5, 0.3, 0.2])[0]
-        away_goals = random.choices([1, 2, 3], weights=[0.4, 0.4, 0.2])[0]
-    else: # Evenly matched or slight difference
-        home_goals = random.choices([0, 1, 2], weights=[0.3, 0.4, 0.3])[0]
-        away_goals = random.choices([0, 1, 2], weights=[0.3, 0.4, 0.3])[0]
-
-    return home_goals, away_goals
+    band = strength_band(a_effective_strength - b_effective_strength)
+    return sample_goals(band, 0, u[2]), sample_goals(band, 1, u[3])
 
 # Simulate all matches in the group stage
-def simulate_group_stage(matches, teams_dict):
-    """
-    Simulates all group stage matches and updates team statistics.
-    teams_dict is used for efficient lookup.
-    """
-    for match in matches:
-        if not match['played']: # Only simulate unplayed matches
-            home_team = teams_dict[match['homeTeamId']]
-            away_team = teams_dict[match['awayTeamId']]
-            home_goals, away_goals = predict_match_outcome(home_team, away_team)
-
-            # Update match results
-            match['homeGoals'] = home_goals
-            match['awayGoals'] = away_goals
-            match['played'] = True # Mark as played
-
-            # Update team stats
-            home_team['matchesPlayed'] += 1
-            away_team['matchesPlayed'] += 1
-            home_team['goalsFor'] += home_goals
-            home_team['goalsAgainst'] += away_goals
-            away_team['goalsFor'] += away_goals
-            away_team['goalsAgainst'] += home_goals
-
-            if home_goals > away_goals:
-                home_team['wins'] += 1
-                away_team['losses'] += 1
-            elif home_goals < away_goals:
-                home_team['losses'] += 1
-                away_team['wins'] += 1
-            else:
-                home_team['draws'] += 1
-                away_team['draws'] += 1
-
-            # Update points
-            home_team['points'] = home_team['wins'] * 3 + home_team['draws']
-            away_team['points'] = away_team['wins'] * 3 + away_team['draws']
-
-def get_group_standings(teams_list):
+def simulate_group_stage(states, streamy_scores, rng):
+    """
+    Simulates all unplayed group stage matches for a batch of simulations and updates team
+    statistics in place. states is (sims x state length); streamy_scores is (sims x teams),
+    in initial_teams_data order.
+    """
+    team_stats, match_results = state_views(states)
+    unplayed = UNPLAYED_MATCHES # Only simulate unplayed matches
+    home, away = MATCH_HOME[unplayed], MATCH_AWAY[unplayed]
+
+    # Goals for every (simulation, match) pair at once
+    home_goals, away_goals = predict_match_outcome(streamy_scores[:, home], streamy_scores[:, away], rng)
+
+    # Update match results
+    match_results[:, unplayed, PLAYED] = 1 # Mark as played
+    match_results[:, unplayed, HOME_GOALS] = home_goals
+    match_results[:, unplayed, AWAY_GOALS] = away_goals
+
+    # Update team stats: (sims x matches) results @ (matches x teams) incidence -> (sims x teams)
+    home_onehot, away_onehot = UNPLAYED_HOME_ONEHOT, UNPLAYED_AWAY_ONEHOT
+    home_win = (home_goals > away_goals).astype(np.int32)
+    away_win = (home_goals < away_goals).astype(np.int32)
+    draw = (home_goals == away_goals).astype(np.int32)
+
+    team_stats[..., MP] += (home_onehot + away_onehot).sum(axis=0)
+    team_stats[..., WINS] += home_win @ home_onehot + away_win @ away_onehot
+    team_stats[..., DRAWS] += draw @ (home_onehot + away_onehot)
+    team_stats[..., LOSSES] += away_win @ home_onehot + home_win @ away_onehot
+    team_stats[..., GF] += home_goals @ home_onehot + away_goals @ away_onehot
+    team_stats[..., GA] += away_goals @ home_onehot + home_goals @ away_onehot
+
+    # Update points
+    team_stats[..., PTS] = team_stats[..., WINS] * 3 + team_stats[..., DRAWS]
+
+# --- Group Ranking ---
+# Groups are ranked for a whole batch of simulations at once: (Pts, GD, GF, name) is packed into
+# one integer per team, so a single argsort per group replaces the per-simulation tuple sort.
+GROUP_TEAMS = np.array([GROUP_MEMBERS[group] for group in GROUPS]) # (groups x teams per group)
+NAME_RANK = np.argsort(np.argsort(TEAM_NAMES, kind='stable')) # Alphabetical rank of each team name
+_KEY_BITS = 10 # Bits per packed field; Pts, GD + offset and GF all stay below 2**10
+_GD_OFFSET = 1 << (_KEY_BITS - 1)
+
+def rank_groups(team_stats):
+    """
+    Ranks every group by points, then goal difference, then goals for, then team name
+    (all descending, as sorted(..., reverse=True) on the tuple does).
+    team_stats is (..., teams x TEAM_STAT_FIELDS); returns (..., groups x teams per group) team
+    indices, position 0 being the group winner.
     """
-    Calculates group standings and returns a dictionary of lists.
-    Each list contains teams sorted by points, then goal difference, then goals for, then name.
+    stats = team_stats[..., GROUP_TEAMS, :].astype(np.int64)
+    key = ((stats[..., PTS] << (3 * _KEY_BITS))
+           | ((stats[..., GF] - stats[..., GA] + _GD_OFFSET) << (2 * _KEY_BITS))
+           | (stats[..., GF] << _KEY_BITS)
+           | NAME_RANK[GROUP_TEAMS])
+    order = np.argsort(-key, axis=-1)
+    return np.take_along_axis(np.broadcast_to(GROUP_TEAMS, key.shape), order, axis=-1)
+
+def simulate_tournament_group_stage_only(streamy_scores, rng):
     """
-    group_standings = defaultdict(list)
-    for team in teams_list:
-        group_standings[team['group']].append(team)
+    Simulates only the group stage of the tournament, for one simulation per row of streamy_scores.
+    Returns the final (sims x state length) array; resetting costs one copy of the initial snapshot.
+    """
+    states = np.repeat(INITIAL_STATE[None, :], len(streamy_scores), axis=0)
 
-    for group_name in group_standings:
-        # Sort by points (desc), then goal difference (desc), then goals for (desc), then team name (asc)
-        group_standings[group_name].sort(
-            key=lambda x: (x['points'], x['goalsFor'] - x['goalsAgainst'], x['goalsFor'], x['name']),
-            reverse=True
-        )
-    return group_standings
+    # Simulate group stage
+    simulate_group_stage(states, streamy_scores, rng)
+    return states
+
+# --- Knockout Stage ---
+# Round-of-16 slots as (group position, group). Adjacent slots meet, and the winners of adjacent
+# ties meet in the next round, through to the final.
+R16_SLOTS = [(0, 'A'), (1, 'B'), (0, 'C'), (1, 'D'), (0, 'E'), (1, 'F'), (0, 'G'), (1, 'H'),
+             (0, 'B'), (1, 'A'), (0, 'D'), (1, 'C'), (0, 'F'), (1, 'E'), (0, 'H'), (1, 'G')]
+R16_POSITIONS = np.array([position for position, _ in R16_SLOTS])
+R16_GROUPS = np.array([GROUPS.index(group) for _, group in R16_SLOTS])
+KNOCKOUT_STAGES = ['Quarter-finals', 'Semi-finals', 'Final', 'Champion'] # Stage reached by each round's winners
+
+def simulate_knockout_matches(home, away, streamy_scores, rng):
+    """
+    Plays a batch of knockout ties; home and away are (sims x ties) team indices.
+    A draw goes to a penalty shootout, which each side wins with probability 0.5.
+    Returns the (sims x ties) winners.
+    """
+    home_goals, away_goals = predict_match_outcome(np.take_along_axis(streamy_scores, home, axis=1),
+                                                   np.take_along_axis(streamy_scores, away, axis=1), rng)
+    home_wins_shootout = rng.random(home.shape) < 0.5
+    home_wins = (home_goals > away_goals) | ((home_goals == away_goals) & home_wins_shootout)
+    return np.where(home_wins, home, away)
 
-def simulate_tournament_group_stage_only(initial_teams_data_copy, all_group_matches_template_copy):
+def simulate_knockout_stage(group_order, streamy_scores, rng):
     """
-    Simulates only the group stage of the tournament.
-    Returns the final standings of all teams after the group stage.
+    Resolves the round of 16 through to the final for a batch of simulations, one round at a time.
+    group_order is the (sims x groups x teams per group) output of rank_groups.
+    Returns one compact int8 array of winners per round, (sims x 8), (sims x 4), (sims x 2), (sims x 1),
+    matching KNOCKOUT_STAGES.
     """
-    # Create a dictionary for efficient team lookup during simulation
-    teams_dict = {team['id']: team for team in initial_teams_data_copy}
+    teams = group_order[:, R16_GROUPS, R16_POSITIONS]
+    round_winners = []
+    while teams.shape[1] > 1:
+        teams = simulate_knockout_matches(teams[:, 0::2], teams[:, 1::2], streamy_scores, rng)
+        round_winners.append(teams.astype(np.int8))
+    return round_winners
+
+def simulate_tournament(streamy_scores, rng):
+    """
+    Simulates the full tournament for one simulation per row of streamy_scores.
+    Returns (final group-stage states, group order, knockout round winners).
+    """
+    final_states = simulate_tournament_group_stage_only(streamy_scores, rng)
+    group_order = rank_groups(state_views(final_states)[0])
+    return final_states, group_order, simulate_knockout_stage(group_order, streamy_scores, rng)
+
+# --- Aggregation ---
+# Results are folded into fixed-size counters block by block, so memory stays constant in the
+# number of simulations. Only the last simulation is kept, for the example table.
+SIM_BLOCK_SIZE = 1000 # Tournaments simulated per batch (and per Pool task)
+TEAMS_PER_GROUP = GROUP_TEAMS.shape[1]
+
+def new_counters():
+    """Returns empty result counters: group position histogram, knockout stage counts and streamy sums."""
+    return {
+        "runs": 0,
+        "positions": np.zeros((len(TEAM_NAMES), TEAMS_PER_GROUP), dtype=np.int64), # [team, group position]
+        "stages": np.zeros((len(KNOCKOUT_STAGES), len(TEAM_NAMES)), dtype=np.int64), # [stage, team]
+        "streamy_sum": np.zeros(len(TEAM_NAMES)),
+        "example": None, # (team stats, group order) of the last simulation
+    }
+
+def add_block_to_counters(counters, final_states, group_order, knockout_round_winners, streamy_scores):
+    """Adds one block of simulated tournaments to the counters in place."""
+    counters["runs"] += len(group_order)
+    # Flattened (team, position) cell of every group finish in the block
+    cells = group_order * TEAMS_PER_GROUP + np.arange(TEAMS_PER_GROUP)
+    counters["positions"] += np.bincount(cells.ravel(), minlength=counters["positions"].size).reshape(counters["positions"].shape)
+    for stage, winners in enumerate(knockout_round_winners):
+        counters["stages"][stage] += np.bincount(winners.ravel(), minlength=len(TEAM_NAMES))
+    counters["streamy_sum"] += streamy_scores.sum(axis=0)
+    counters["example"] = (state_views(final_states)[0][-1].copy(), group_order[-1].copy())
+
+def merge_counters(total, part):
+    """Merges one block's counters into the running total in place and returns it."""
+    for key in ("positions", "stages", "streamy_sum"):
+        total[key] += part[key]
+    total["runs"] += part["runs"]
+    total["example"] = part["example"] # Blocks are merged in order, so this stays the last simulation
+    return total
+
+def simulation_blocks(total_runs):
+    """Yields block sizes of at most SIM_BLOCK_SIZE adding up to total_runs."""
+    for start in range(0, total_runs, SIM_BLOCK_SIZE):
+        yield min(SIM_BLOCK_SIZE, total_runs - start)
+
+# --- Parallel Execution ---
+def simulation_tasks(total_runs, seed=None):
+    """
+    Splits the runs into (block size, SeedSequence) tasks. Each block gets its own child of one root
+    SeedSequence, so results for a given seed do not depend on how many workers run the blocks.
+    """
+    block_sizes = list(simulation_blocks(total_runs))
+    return list(zip(block_sizes, np.random.SeedSequence(seed).spawn(len(block_sizes))))
 
-    # Simulate group stage
-    simulate_group_stage(all_group_matches_template_copy, teams_dict)
-    
-    # Return the updated list of teams (their current standings)
-    return list(teams_dict.values())
+def simulate_tournament_block(task):
+    """
+    Pool worker: simulates one block of tournaments from the block's own RNG stream and returns its counters.
+    Every simulation draws its own random streamy weights, exactly as in a serial run.
+    """
+    block_size, seed_seq = task
+    rng = np.random.default_rng(seed_seq)
+    # Random weights for every simulation in the block and the resulting streamy scores: (sims x teams)
+    sim_streamy_scores = compute_streamy_scores(draw_streamy_weights(block_size, rng), TEAM_FEATURES)
+
+    # Run the block's tournament simulations, each with its own streamy scores
+    final_states, group_order, knockout_round_winners = simulate_tournament(sim_streamy_scores, rng)
+
+    # Aggregate group stage positions and knockout progress
+    counters = new_counters()
+    add_block_to_counters(counters, final_states, group_order, knockout_round_winners, sim_streamy_scores)
+    return counters
+
+def run_simulations(num_simulations, seed=None, workers=1):
+    """Runs num_simulations tournaments, in a Pool when workers > 1, and returns the merged counters."""
+    tasks = simulation_tasks(num_simulations, seed)
+    counters = new_counters()
+    with tqdm(total=num_simulations, desc="Simulations") as progress:
+        if workers > 1:
+            with Pool(processes=workers, initializer=install_team_features, initargs=(TEAM_FEATURES,)) as pool:
+                for part in pool.imap(simulate_tournament_block, tasks):
+                    merge_counters(counters, part)
+                    progress.update(part["runs"])
+        else:
+            for part in map(simulate_tournament_block, tasks):
+                merge_counters(counters, part)
+                progress.update(part["runs"])
+    return counters
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="FIFA Club World Cup Monte Carlo Simulator")
+    parser.add_argument('--simulations', type=int, default=NUM_SIMULATIONS, help='Number of tournaments to simulate')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducibility')
+    parser.add_argument('--workers', type=int, default=cpu_count(), help='Worker processes (1 runs serially)')
+    return parser.parse_args()
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    group_winner_counts = defaultdict(int)
-    qualified_counts = defaultdict(int) # Counts how many times a team qualified from group stage
-
-    # Store a list of final group standings from each simulation
-    all_simulation_group_standings = []
-    # For averaging streamy scores
-    streamy_score_runs = {team['name']: [] for team in initial_teams_data}
-    
-    print(f"Running {NUM_SIMULATIONS} Monte Carlo simulations (Group Stage Only)...")
-
-    for sim_num in tqdm(range(NUM_SIMULATIONS), desc="Simulations"):
-        # Generate random weights for each stat, sum to 1
-        w = [random.random() for _ in range(5)]
-        wsum = sum(w)
-        weights = {
-            'sofa': w[0]/wsum,
-            'player': w[1]/wsum,
-            'goals': w[2]/wsum,
-            'assists': w[3]/wsum,
-            'perf': w[4]/wsum
-        }
-        # Deep copy teams and matches
-        teams_for_sim = json.loads(json.dumps(initial_teams_data))
-        matches_for_sim = json.loads(json.dumps(all_group_matches_template))
-
-        # Compute streamy score for each team for this run
-        for team in teams_for_sim:
-            team['streamyScore'] = compute_team_streamy_score_with_weights(team, player_df, weights)
-            streamy_score_runs[team['name']].append(team['streamyScore'])
-
-        # Run one tournament simulation (group stage only)
-        final_teams_in_sim = simulate_tournament_group_stage_only(teams_for_sim, matches_for_sim)
-
-        # Aggregate group stage qualification and winner data
-        sim_group_standings = get_group_standings(final_teams_in_sim)
-        all_simulation_group_standings.append(sim_group_standings)
-
-        for group_name, standings in sim_group_standings.items():
-            if standings:
-                group_winner_counts[standings[0]['name']] += 1
-                # Top 2 teams from each group qualify
-                for i in range(min(2, len(standings))):
-                    qualified_counts[standings[i]['name']] += 1
+    args = parse_args()
+    NUM_SIMULATIONS = args.simulations
+
+    # Load player data and build the streamy features once; workers receive them through the initializer
+    player_df = load_player_data(PLAYER_CSV_FILE_PATH)
+    install_team_features(build_team_features(initial_teams_data, player_df))
+    set_initial_streamy_scores(initial_teams_data, player_df, TEAM_FEATURES, NUM_SIMULATIONS)
+
+    print(f"Running {NUM_SIMULATIONS} Monte Carlo simulations (Group Stage and Knockouts)...")
+    counters = run_simulations(NUM_SIMULATIONS, args.seed, args.workers)
 
     # After all runs, set each team's streamyScore to the average
-    for team in initial_teams_data:
-        scores = streamy_score_runs[team['name']]
-        team['streamyScore'] = np.mean(scores) if scores else 0
+    if NUM_SIMULATIONS > 0:
+        for team, avg_score in zip(initial_teams_data, counters["streamy_sum"] / counters["runs"]):
+            team['streamyScore'] = float(avg_score)
+
+    group_winner_counts = counters["positions"][:, 0]
+    qualified_counts = counters["positions"][:, :2].sum(axis=1) # Top 2 teams from each group qualify
+    stage_counts = dict(zip(KNOCKOUT_STAGES, counters["stages"]))
 
-    print("\n=== Monte Carlo Simulation Results (Group Stage Only) ===")
+    print("\n=== Monte Carlo Simulation Results ===")
 
     # Calculate and print Group Winner Probabilities
     print("\n--- Group Winner Probabilities ---")
-    all_groups = sorted(list(set(team['group'] for team in initial_teams_data)))
-
-    for group in all_groups:
+    for group in GROUPS:
         print(f"\nGroup {group}:")
-        
-        group_specific_winner_counts = defaultdict(int)
-        for sim_standings in all_simulation_group_standings:
-            if group in sim_standings and sim_standings[group]:
-                group_specific_winner_counts[sim_standings[group][0]['name']] += 1
 
-        total_group_wins = sum(group_specific_winner_counts.values())
+        # Teams that won the group at least once, most frequent first
+        group_winners = [i for i in GROUP_MEMBERS[group] if group_winner_counts[i] > 0]
+        total_group_wins = sum(group_winner_counts[i] for i in group_winners)
         if total_group_wins > 0:
-            sorted_group_winners = sorted(group_specific_winner_counts.items(), key=lambda item: item[1], reverse=True)
-            for team_name, count in sorted_group_winners:
-                probability = (count / total_group_wins) * 100
-                print(f"  {team_name:<26}: {probability:>6.2f}%")
+            for team_idx in sorted(group_winners, key=lambda i: group_winner_counts[i], reverse=True):
+                probability = (group_winner_counts[team_idx] / total_group_wins) * 100
+                print(f"  {TEAM_NAMES[team_idx]:<26}: {probability:>6.2f}%")
         else:
             print(f"  No group winners recorded for Group {group}.")
 
@@ -410,21 +736,31 @@ if __name__ == "__main__":
     # Calculate and print Qualification Probabilities (now explicitly labeled as Top 2 Finish Probability)
     print("\n--- Top 2 Finish Probability (Group Stage Qualification) ---")
     if NUM_SIMULATIONS > 0:
-        sorted_qualifiers = sorted(qualified_counts.items(), key=lambda item: item[1], reverse=True)
-        for team_name, count in sorted_qualifiers:
-            probability = (count / NUM_SIMULATIONS) * 100
-            print(f"{team_name:<28}: {probability:>6.2f}%")
+        qualifiers = [i for i in range(len(TEAM_NAMES)) if qualified_counts[i] > 0]
+        for team_idx in sorted(qualifiers, key=lambda i: qualified_counts[i], reverse=True):
+            probability = (qualified_counts[team_idx] / NUM_SIMULATIONS) * 100
+            print(f"{TEAM_NAMES[team_idx]:<28}: {probability:>6.2f}%")
     else:
         print("No qualifications recorded (NUM_SIMULATIONS is 0).")
 
 
+    # Calculate and print Knockout Stage and Title Probabilities
+    print("\n--- Knockout Stage Probabilities ---")
+    if NUM_SIMULATIONS > 0:
+        print(f"{'Team':<28} {'QF':>7} {'SF':>7} {'Final':>7} {'Title':>7}")
+        for team_idx in np.argsort(-stage_counts['Champion'], kind='stable'):
+            stage_probabilities = [100 * stage_counts[stage][team_idx] / NUM_SIMULATIONS for stage in KNOCKOUT_STAGES]
+            print(f"{TEAM_NAMES[team_idx]:<28} " + " ".join(f"{p:>6.2f}%" for p in stage_probabilities))
+    else:
+        print("No knockout results recorded (NUM_SIMULATIONS is 0).")
+
+
     # --- Example Final Table from one simulation ---
     print("\n=== Example Group Stage Results from ONE Simulation ===")
-    if all_simulation_group_standings:
-        example_standings = all_simulation_group_standings[-1] # Take the last one
-
-        for group in sorted(example_standings.keys()):
-            group_teams = example_standings[group]
+    if counters["example"] is not None:
+        example_team_stats, example_group_order = counters["example"] # Take the last one
+        for group_idx, group in enumerate(GROUPS):
+            group_teams = example_group_order[group_idx]
             
             # Need original data for this part, as streamyScore isn't updated during simulation run.
             original_group_teams_data = [team for team in initial_teams_data if team['group'] == group]
@@ -446,15 +782,16 @@ if __name__ == "__main__":
             print(f"\nGroup {group}")
             print(f"{'Team':<28} {'Pts':>3} {'W':>2} {'D':>2} {'L':>2} {'GF':>3} {'GA':>3} {'GD':>3} {'Sofa':>5} {'StreamyScore':>12}")
             print("-" * 100)
-            for idx, team in enumerate(group_teams):
-                original_team_data = next(t for t in initial_teams_data if t['id'] == team['id'])
+            for idx, team_idx in enumerate(group_teams):
+                original_team_data = initial_teams_data[team_idx]
+                pts, wins, draws, losses, gf, ga = (example_team_stats[team_idx, col] for col in (PTS, WINS, DRAWS, LOSSES, GF, GA))
                 sofa_pct = norm(original_team_data['sofaScoreAverage'], sofa_min, sofa_max)
                 streamy_pct = norm(original_team_data['streamyScore'], streamy_min, streamy_max)
                 
                 # Check for qualification based on actual standings
                 qualifies_status = 'YES' if idx < 2 else '' # Top 2 qualify
 
-                print(f"{team['name']:<28} {team['points']:>3} {team['wins']:>2} {team['draws']:>2} {team['losses']:>2} {team['goalsFor']:>3} {team['goalsAgainst']:>3} {team['goalsFor']-team['goalsAgainst']:>3} {original_team_data['sofaScoreAverage']:>5.2f} {original_team_data['streamyScore']:>12.2f} {qualifies_status:>7}")
+                print(f"{TEAM_NAMES[team_idx]:<28} {pts:>3} {wins:>2} {draws:>2} {losses:>2} {gf:>3} {ga:>3} {gf-ga:>3} {original_team_data['sofaScoreAverage']:>5.2f} {original_team_data['streamyScore']:>12.2f} {qualifies_status:>7}")
 
     else:
         print("\nNo simulation results to display an example table.")
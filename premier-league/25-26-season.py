@@ -1,9 +1,12 @@
 import numpy as np
-from collections import defaultdict
 from tqdm import tqdm
 import itertools
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Pool, cpu_count, shared_memory
 import random
+import argparse
+import csv
+
+from league_table import rank_tables, european_places
 
 # --- Global Constants ---
 # These are the teams in our simulation
@@ -14,6 +17,11 @@ TEAMS = [
     "Manchester United", "Tottenham Hotspur",
     "Leeds United", "Burnley", "Sunderland"
 ]
+NUM_TEAMS = len(TEAMS)
+MAX_SEASON_POINTS = 3 * 2 * (NUM_TEAMS - 1) # A team winning every home and away match
+
+# Order of the per-team qualification counters kept by the aggregators
+QUAL_KEYS = ["CL", "EL", "ECL", "Overall", "Title"]
 
 # Define league coefficients. Adjust these based on your data source's league context.
 LEAGUE_COEFFICIENTS = {
@@ -284,17 +292,20 @@ def simulate_score_data_only(home_attack_rating, away_defense_rating, away_attac
     Defense_Rating = LEAGUE_AVG_GA_PER_90 / Team_GA_per_90 (inverted, higher is better defense)
     
     lambda = Attack_Rating * Defense_Rating * LEAGUE_AVG_GLS_PER_90
+
+    Ratings may be scalars or equally shaped arrays (one entry per fixture).
     """
     
     # Ensure no division by zero or very small numbers for ratings
     # If league averages are 0, this indicates a data issue.
     if LEAGUE_AVG_XG_PLUS_XAG_PER_90 == 0 or LEAGUE_AVG_GA_PER_90 == 0:
         print("Error: League averages are zero. Cannot accurately simulate goals. Check data.")
-        return 0, 0 # Return 0 goals to prevent errors, but indicates a problem.
+        no_goals = np.zeros(np.shape(home_attack_rating), dtype=np.int64)
+        return no_goals, no_goals.copy() # Return 0 goals to prevent errors, but indicates a problem.
 
     # Ensure defense ratings are not zero to prevent division by zero in next step
-    away_defense_rating = max(0.01, away_defense_rating)
-    home_defense_rating = max(0.01, home_defense_rating)
+    away_defense_rating = np.maximum(0.01, away_defense_rating)
+    home_defense_rating = np.maximum(0.01, home_defense_rating)
 
     # Calculate actual attack and defense ratings for the specific match
     # Home team's attack rating relative to league average
@@ -314,103 +325,243 @@ def simulate_score_data_only(home_attack_rating, away_defense_rating, away_attac
     away_lambda = away_att_rating * home_def_rating * LEAGUE_AVG_GLS_PER_90
 
     # Ensure lambdas are reasonable and positive for Poisson distribution
-    home_lambda = max(0.1, home_lambda)
-    away_lambda = max(0.1, away_lambda)
+    home_lambda = np.maximum(0.1, home_lambda)
+    away_lambda = np.maximum(0.1, away_lambda)
     
     return np.random.poisson(home_lambda), np.random.poisson(away_lambda)
 
-# --- Simulation Execution (NO ELO) ---
-def simulate_season_data_only(weight_set_idx):
+# --- Fixture Arrays ---
+# Every ordered (home, away) pairing of TEAMS; position k in these arrays is fixture k.
+FIXTURE_HOME, FIXTURE_AWAY = (np.array(side, dtype=np.intp)
+                              for side in zip(*itertools.permutations(range(NUM_TEAMS), 2)))
+FIXTURE_INDEX = {(h, a): k for k, (h, a) in enumerate(zip(FIXTURE_HOME.tolist(), FIXTURE_AWAY.tolist()))}
+
+def fixture_incidence(home_idx, away_idx):
+    """One-hot (fixtures x teams) matrices marking the home and away side of each fixture."""
+    rows = np.arange(len(home_idx))
+    home_onehot = np.zeros((len(home_idx), NUM_TEAMS), dtype=np.int32)
+    away_onehot = np.zeros((len(away_idx), NUM_TEAMS), dtype=np.int32)
+    home_onehot[rows, home_idx] = 1
+    away_onehot[rows, away_idx] = 1
+    return home_onehot, away_onehot
+
+def results_to_stats(home_goals, away_goals, home_onehot, away_onehot):
     """
-    Simulates a full league season for one weight set, using weighted historical
-    squad data (xG+xAG for attack, GA for defense), without any ELO system.
+    Turns the goals of a set of fixtures into per-team stats (MP, W, D, L, GF, GA, Pts, GD).
+    Goal arrays may carry leading batch dimensions: (..., fixtures) -> (..., teams, 8).
+    """
+    hg = np.asarray(home_goals, dtype=np.int32)
+    ag = np.asarray(away_goals, dtype=np.int32)
+    home_win = (hg > ag).astype(np.int32)
+    away_win = (hg < ag).astype(np.int32)
+    draw = (hg == ag).astype(np.int32)
+
+    def per_team(home_values, away_values):
+        return home_values @ home_onehot + away_values @ away_onehot
+
+    played = per_team(np.ones_like(hg), np.ones_like(ag))
+    wins = per_team(home_win, away_win)
+    draws = per_team(draw, draw)
+    losses = per_team(away_win, home_win)
+    goals_for = per_team(hg, ag)
+    goals_against = per_team(ag, hg)
+    return np.stack([played, wins, draws, losses, goals_for, goals_against,
+                     3 * wins + draws, goals_for - goals_against], axis=-1)
+
+# --- Season State ---
+# Table before any remaining fixture is simulated, and the fixtures still to be played.
+# Defaults to a fresh season; set_season_state() replaces it in mid-season mode.
+INITIAL_STATS = np.zeros((NUM_TEAMS, 8), dtype=np.int32)
+REMAINING_FIXTURES = np.arange(len(FIXTURE_HOME))
+REMAINING_HOME_ONEHOT, REMAINING_AWAY_ONEHOT = fixture_incidence(FIXTURE_HOME, FIXTURE_AWAY)
+
+def set_season_state(initial_stats, remaining_fixtures):
+    """Sets the starting table and the fixtures left to simulate (call before starting the Pool)."""
+    global INITIAL_STATS, REMAINING_FIXTURES, REMAINING_HOME_ONEHOT, REMAINING_AWAY_ONEHOT
+    INITIAL_STATS = np.asarray(initial_stats, dtype=np.int32)
+    REMAINING_FIXTURES = np.asarray(remaining_fixtures, dtype=np.intp)
+    REMAINING_HOME_ONEHOT, REMAINING_AWAY_ONEHOT = fixture_incidence(
+        FIXTURE_HOME[REMAINING_FIXTURES], FIXTURE_AWAY[REMAINING_FIXTURES])
+
+def load_completed_results(csv_path):
+    """
+    Loads completed fixtures from a CSV with HomeTeam, AwayTeam, HomeGoals and AwayGoals
+    columns (team names as in TEAMS). Returns the table built from those results and the
+    indices of the fixtures that are still to be played.
     """
-    current_season_weights = WEIGHT_SETS[weight_set_idx]
     team_indices = {team: idx for idx, team in enumerate(TEAMS)}
-    
-    # Stats array: MP, Wins, Draws, Losses, GF, GA, Pts, GD
-    stats = np.zeros((len(TEAMS), 8), dtype=np.int32) 
-
-    # Precompute weighted averages for xG_plus_xAG_per_90 (attack) and GA_per_90 (defense)
-    # These are their 'strength' values for the current season based on past performance
-    team_attack_ratings = {team: weighted_avg_metric(team, 'xG_plus_xAG_per_90', current_season_weights) for team in TEAMS}
-    team_defense_ratings = {team: weighted_avg_metric(team, 'GA_per_90', current_season_weights) for team in TEAMS}
-
-    # Generate fixtures (all vs all, home and away)
-    FIXTURES = list(itertools.permutations(TEAMS, 2)) # Each team plays each other home & away
-    random.shuffle(FIXTURES) # Randomize fixture order for each simulation
-
-    for home, away in FIXTURES:
-        i, j = team_indices[home], team_indices[away]
+    played = np.zeros(len(FIXTURE_HOME), dtype=bool)
+    home_idx, away_idx, home_goals, away_goals = [], [], [], []
+
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            home, away = row['HomeTeam'].strip(), row['AwayTeam'].strip()
+            if home not in team_indices or away not in team_indices:
+                unknown = home if home not in team_indices else away
+                raise ValueError(f"{csv_path}:{line_no}: unknown team '{unknown}'")
+            fixture = FIXTURE_INDEX.get((team_indices[home], team_indices[away]))
+            if fixture is None:
+                raise ValueError(f"{csv_path}:{line_no}: '{home}' cannot play itself")
+            if played[fixture]:
+                raise ValueError(f"{csv_path}:{line_no}: duplicate result for {home} vs {away}")
+            played[fixture] = True
+            home_idx.append(team_indices[home])
+            away_idx.append(team_indices[away])
+            home_goals.append(int(row['HomeGoals']))
+            away_goals.append(int(row['AwayGoals']))
+
+    initial_stats = results_to_stats(home_goals, away_goals,
+                                     *fixture_incidence(np.array(home_idx, dtype=np.intp),
+                                                        np.array(away_idx, dtype=np.intp)))
+    return initial_stats.astype(np.int32), np.flatnonzero(~played)
+
+# --- Shared Model Arrays ---
+# Everything a worker needs to simulate a season, precomputed once in the parent as plain
+# arrays: per-weight-set attack/defense ratings, league averages and the fixture arrays.
+# They are copied into multiprocessing.shared_memory blocks and every Pool worker attaches
+# zero-copy views, so workers never touch TEAM_SEASON_DATA or WEIGHT_SETS and start up the
+# same way under fork and spawn.
+MODEL = None
+_ATTACHED_BLOCKS = [] # Keeps worker-side SharedMemory handles alive for the life of the process
+
+def build_model_arrays(weight_sets):
+    """Precomputes the rating matrices (weight sets x teams) and fixture arrays for the current season state."""
+    return {
+        "attack": np.array([[weighted_avg_metric(team, 'xG_plus_xAG_per_90', w) for team in TEAMS] for w in weight_sets]),
+        "defense": np.array([[weighted_avg_metric(team, 'GA_per_90', w) for team in TEAMS] for w in weight_sets]),
+        "league_avgs": np.array([LEAGUE_AVG_GLS_PER_90, LEAGUE_AVG_GA_PER_90, LEAGUE_AVG_XG_PLUS_XAG_PER_90]),
+        "initial_stats": INITIAL_STATS,
+        "remaining_home": FIXTURE_HOME[REMAINING_FIXTURES],
+        "remaining_away": FIXTURE_AWAY[REMAINING_FIXTURES],
+        "home_onehot": REMAINING_HOME_ONEHOT,
+        "away_onehot": REMAINING_AWAY_ONEHOT,
+    }
+
+def install_model(arrays):
+    """Makes the given model arrays the ones used by simulate_seasons_data_only."""
+    global MODEL, LEAGUE_AVG_GLS_PER_90, LEAGUE_AVG_GA_PER_90, LEAGUE_AVG_XG_PLUS_XAG_PER_90
+    MODEL = arrays
+    LEAGUE_AVG_GLS_PER_90, LEAGUE_AVG_GA_PER_90, LEAGUE_AVG_XG_PLUS_XAG_PER_90 = arrays["league_avgs"].tolist()
+
+def share_model_arrays(arrays):
+    """
+    Copies model arrays into shared memory blocks.
+    Returns the blocks (the caller must close and unlink them) and picklable
+    (name, shape, dtype) specs for attach_shared_model.
+    """
+    blocks, specs = [], {}
+    for key, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        block = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+        blocks.append(block)
+        specs[key] = (block.name, arr.shape, arr.dtype.str)
+    return blocks, specs
+
+def attach_shared_model(specs):
+    """Pool initializer: attaches read-only views of the shared model arrays and installs them."""
+    arrays = {}
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        _ATTACHED_BLOCKS.append(block)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        arrays[key] = view
+    install_model(arrays)
 
-        # Simulate one match per fixture using the data-driven model
-        home_goals_match, away_goals_match = simulate_score_data_only(
-            team_attack_ratings[home], team_defense_ratings[away], # Home's attack vs Away's defense
-            team_attack_ratings[away], team_defense_ratings[home]  # Away's attack vs Home's defense
-        )
-        
-        # Update season statistics (Matches Played, Goals For, Goals Against, Goal Difference)
-        stats[i,0] += 1; stats[j,0] += 1 # MP
-        stats[i,4] += home_goals_match; stats[j,4] += away_goals_match # GF
-        stats[i,5] += away_goals_match; stats[j,5] += home_goals_match # GA
-        stats[i,7] += home_goals_match - away_goals_match # GD
-        stats[j,7] += away_goals_match - home_goals_match # GD
-
-        # Update Wins, Draws, Losses, and Points
-        if home_goals_match > away_goals_match:
-            stats[i,1] += 1; stats[i,6] += 3; stats[j,3] += 1 # Home Win
-        elif away_goals_match > home_goals_match:
-            stats[j,1] += 1; stats[j,6] += 3; stats[i,3] += 1 # Away Win
-        else:
-            stats[i,2] += 1; stats[j,2] += 1; stats[i,6] += 1; stats[j,6] += 1 # Draw
-
-    # Sort final league table
-    table = sorted(((team, stats[idx]) for team, idx in team_indices.items()),
-                   key=lambda x: (x[1][6], x[1][7], x[1][4]), reverse=True) # Points, GD, GF
-
-    # Determine European qualification and title winner
-    final_league_positions = {team: i+1 for i, (team, _) in enumerate(table)}
-    cl, el, ecl = set(), set(), set()
-    NUM_CL_LEAGUE_SPOTS = 5 # Example: Top 5 qualify for Champions League
-    
-    for i in range(min(NUM_CL_LEAGUE_SPOTS, len(table))): 
-        cl.add(table[i][0])
-    
-    for team, pos in final_league_positions.items():
-        if team not in cl and pos == NUM_CL_LEAGUE_SPOTS + 1: # Next spot for EL
-            el.add(team)
-        if team not in cl and team not in el and pos == NUM_CL_LEAGUE_SPOTS + 2: # Next spot for ECL
-            ecl.add(team)
-    
-    all_eur = cl | el | ecl
-    title = table[0][0] # League winner
+# --- Simulation Execution (NO ELO) ---
+def simulate_seasons_data_only(weight_set_indices):
+    """
+    Simulates the rest of a league season once per weight set index, using weighted historical
+    squad data (xG+xAG for attack, GA for defense), without any ELO system.
+    Starts from the model's initial table and simulates every remaining fixture of every
+    season in one vectorized draw. Returns a (seasons, teams, 8) stats array.
+    """
+    # Weighted averages of xG_plus_xAG_per_90 (attack) and GA_per_90 (defense) per weight set,
+    # precomputed in build_model_arrays: (seasons, teams)
+    team_attack_ratings = MODEL["attack"][weight_set_indices]
+    team_defense_ratings = MODEL["defense"][weight_set_indices]
+
+    # Ratings are fixed for the whole season, so fixture order has no effect on the results.
+    home = MODEL["remaining_home"]
+    away = MODEL["remaining_away"]
+    home_goals, away_goals = simulate_score_data_only(
+        team_attack_ratings[:, home], team_defense_ratings[:, away], # Home's attack vs Away's defense
+        team_attack_ratings[:, away], team_defense_ratings[:, home]  # Away's attack vs Home's defense
+    )
 
-    final_team_stats = {team: stats[team_indices[team]].tolist() for team in TEAMS}
-    
-    # Return results without ELO
-    return cl, el, ecl, all_eur, title, final_team_stats
+    # Stats array: MP, Wins, Draws, Losses, GF, GA, Pts, GD
+    return MODEL["initial_stats"] + results_to_stats(home_goals, away_goals,
+                                                     MODEL["home_onehot"], MODEL["away_onehot"])
 
 # --- Aggregation and Display Functions ---
-def aggregate_results(results):
-    """Aggregates results from multiple season simulations."""
-    qual_counts = {team: {"CL":0,"EL":0,"ECL":0,"Overall":0,"Title":0} for team in TEAMS}
-    summed_team_stats = defaultdict(lambda: np.zeros(8, dtype=np.float64)) # Use float for averages
-
-    for cl, el, ecl, all_eur, title, final_team_stats in results:
-
-        for t in cl: qual_counts[t]["CL"] += 1
-        for t in el: qual_counts[t]["EL"] += 1
-        for t in ecl: qual_counts[t]["ECL"] += 1
-        for t in all_eur: qual_counts[t]["Overall"] += 1
-        qual_counts[title]["Title"] += 1
-
-        for team, stats_list in final_team_stats.items():
-            summed_team_stats[team] += np.array(stats_list)
-            
-    return qual_counts, summed_team_stats
-
-def display_results(qual_counts, summed_team_stats, RUNS):
+# Results are streamed into fixed-size count arrays so memory does not grow with the
+# number of simulations: each worker fills its own arrays for a block of seasons and
+# the parent merges them with a handful of array additions.
+def new_aggregate():
+    """Returns an empty aggregate of fixed-size count arrays (team axis follows TEAMS)."""
+    return {
+        "runs": 0,
+        "qual": np.zeros((NUM_TEAMS, len(QUAL_KEYS)), dtype=np.int64),
+        "stats": np.zeros((NUM_TEAMS, 8), dtype=np.int64), # Summed MP, W, D, L, GF, GA, Pts, GD
+        "positions": np.zeros((NUM_TEAMS, NUM_TEAMS), dtype=np.int64), # [team, final position - 1]
+        "points": np.zeros((NUM_TEAMS, MAX_SEASON_POINTS + 1), dtype=np.int64), # [team, final points]
+    }
+
+def add_seasons_to_aggregate(agg, season_stats):
+    """Ranks a (seasons, teams, 8) batch of final tables and adds it to an aggregate in place."""
+    num_seasons = season_stats.shape[0]
+    team_ids = np.broadcast_to(np.arange(NUM_TEAMS), (num_seasons, NUM_TEAMS))
+
+    # Rank by Points, GD, GF and read European places and the title straight off the positions
+    _, positions = rank_tables(season_stats[..., 6], season_stats[..., 7], season_stats[..., 4])
+    places = european_places(positions)
+    agg["qual"] += np.stack([places[key].sum(axis=0) for key in QUAL_KEYS], axis=1)
+
+    agg["stats"] += season_stats.sum(axis=0)
+    agg["positions"] += np.bincount((team_ids * NUM_TEAMS + positions).ravel(),
+                                    minlength=NUM_TEAMS * NUM_TEAMS).reshape(NUM_TEAMS, NUM_TEAMS)
+    agg["points"] += np.bincount((team_ids * (MAX_SEASON_POINTS + 1) + season_stats[..., 6]).ravel(),
+                                 minlength=NUM_TEAMS * (MAX_SEASON_POINTS + 1)).reshape(NUM_TEAMS, -1)
+    agg["runs"] += num_seasons
+    return agg
+
+def merge_aggregates(total, part):
+    """Merges one aggregate into another in place and returns it."""
+    for key in ("qual", "stats", "positions", "points"):
+        total[key] += part[key]
+    total["runs"] += part["runs"]
+    return total
+
+def simulate_season_block(weight_set_indices):
+    """Pool worker: simulates one season per weight set index and returns the block's aggregate."""
+    season_stats = simulate_seasons_data_only(np.asarray(weight_set_indices, dtype=np.intp))
+    return add_seasons_to_aggregate(new_aggregate(), season_stats)
+
+def aggregate_results(block_aggregates):
+    """Merges per-block aggregates as they arrive; individual seasons are never retained."""
+    total = new_aggregate()
+    for part in block_aggregates:
+        merge_aggregates(total, part)
+    return total
+
+def points_percentiles(points_hist, percentiles=(5, 50, 95)):
+    """
+    Reads points percentiles per team straight off the points histogram.
+    Returns an int array of shape (num_teams, len(percentiles)).
+    """
+    cumulative = np.cumsum(points_hist, axis=1)
+    totals = cumulative[:, -1:]
+    result = np.empty((points_hist.shape[0], len(percentiles)), dtype=np.int64)
+    for k, pct in enumerate(percentiles):
+        # First points value whose cumulative count reaches the requested share of seasons
+        result[:, k] = np.argmax(cumulative * 100 >= totals * pct, axis=1)
+    return result
+
+def display_results(agg, RUNS):
     """Displays aggregated simulation results."""
+    qual_counts = {team: dict(zip(QUAL_KEYS, agg["qual"][idx].tolist())) for idx, team in enumerate(TEAMS)}
+    summed_team_stats = {team: agg["stats"][idx].astype(np.float64) for idx, team in enumerate(TEAMS)}
     
     # Calculate average European slots (for general idea, not per team)
     total_cl = sum(qc["CL"] for qc in qual_counts.values())
@@ -460,9 +611,40 @@ def display_results(qual_counts, summed_team_stats, RUNS):
     for team, avg_s in sorted_avg_stats:
         print(f"{team:<20} | {int(avg_s[0]):>4} | {int(avg_s[1]):>4} | {int(avg_s[2]):>4} | {int(avg_s[3]):>4} | {int(avg_s[4]):>4} | {int(avg_s[5]):>4} | {int(avg_s[7]):>4} | {int(avg_s[6]):>4}")
 
+def display_distributions(agg, RUNS):
+    """Displays finishing-position distributions and points percentiles from the histograms."""
+    avg_points = agg["stats"][:, 6] / RUNS
+    display_order = np.argsort(-avg_points, kind="stable") # Highest average points first
+
+    print("\n--- Finishing Position Distribution (% of seasons) ---")
+    header = f"{'Team':<20} |" + "".join(f"{pos:>6}" for pos in range(1, NUM_TEAMS + 1))
+    print(header)
+    print("-" * len(header))
+    position_pct = agg["positions"] * 100.0 / RUNS
+    for idx in display_order:
+        print(f"{TEAMS[idx]:<20} |" + "".join(f"{pct:>6.1f}" for pct in position_pct[idx]))
+
+    print("\n--- Points Distribution ---")
+    pct_levels = (5, 25, 50, 75, 95)
+    header = f"{'Team':<20} | {'Mean':>6} | " + " | ".join(f"{'P' + str(p):>4}" for p in pct_levels)
+    print(header)
+    print("-" * len(header))
+    pts_percentiles = points_percentiles(agg["points"], pct_levels)
+    for idx in display_order:
+        print(f"{TEAMS[idx]:<20} | {avg_points[idx]:>6.1f} | " + " | ".join(f"{p:>4}" for p in pts_percentiles[idx]))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Premier League 2025-26 Season Simulator")
+    parser.add_argument('--results', type=str, default=None,
+                        help='CSV of completed results (HomeTeam,AwayTeam,HomeGoals,AwayGoals); only the remaining fixtures are simulated')
+    parser.add_argument('--simulations', type=int, default=10000, help='Number of times to simulate the league season')
+    return parser.parse_args()
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    args = parse_args()
+
     # --- Step 1: Data Setup ---
     # No CSV loading needed as data is embedded
     print("Using embedded squad season data. Calculating league averages...")
@@ -483,21 +665,45 @@ if __name__ == "__main__":
 
     # Generate weight sets for the number of available historical seasons
     WEIGHT_SETS = generate_weight_sets(num_sets=100, num_seasons=num_historical_seasons)
+
+    # Mid-season mode: condition on the completed results and simulate only what is left
+    if args.results:
+        try:
+            initial_stats, remaining_fixtures = load_completed_results(args.results)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Error: Could not load completed results from '{args.results}': {e}")
+            exit()
+        set_season_state(initial_stats, remaining_fixtures)
+        print(f"Loaded {len(FIXTURE_HOME) - len(REMAINING_FIXTURES)} completed results; "
+              f"{len(REMAINING_FIXTURES)} fixtures remaining.")
     
-    NUM_SIMULATIONS = 10000 # Number of times to simulate the league season
+    NUM_SIMULATIONS = args.simulations # Number of times to simulate the league season
 
     print(f"\nStarting {NUM_SIMULATIONS} season simulations (using weighted historical squad data only, NO ELO)...")
     
-    # Prepare parameters for multiprocessing: only weight_set_idx is needed
+    # Prepare parameters for multiprocessing: only weight_set_idx is needed.
+    # Seasons are handed out in blocks; each worker returns one fixed-size aggregate per block.
+    BLOCK_SIZE = 250
     sim_params = [i % len(WEIGHT_SETS) for i in range(NUM_SIMULATIONS)]
-
-    # Use multiprocessing to run simulations in parallel
-    with Pool(processes=cpu_count()) as pool:
-        # Using tqdm for a progress bar
-        all_results = list(tqdm(pool.imap(simulate_season_data_only, sim_params), total=NUM_SIMULATIONS))
-
-    print("\nAggregating results...")
-    qual_counts, summed_team_stats = aggregate_results(all_results)
+    sim_blocks = [sim_params[i:i + BLOCK_SIZE] for i in range(0, NUM_SIMULATIONS, BLOCK_SIZE)]
+
+    # Precompute the rating matrices and fixture arrays once and share them with the workers
+    shared_blocks, shared_specs = share_model_arrays(build_model_arrays(WEIGHT_SETS))
+
+    # Use multiprocessing to run simulations in parallel, merging block aggregates as they arrive
+    try:
+        with Pool(processes=cpu_count(), initializer=attach_shared_model, initargs=(shared_specs,)) as pool, \
+                tqdm(total=NUM_SIMULATIONS) as pbar:
+            def block_results():
+                for part in pool.imap_unordered(simulate_season_block, sim_blocks):
+                    pbar.update(part["runs"])
+                    yield part
+            agg = aggregate_results(block_results())
+    finally:
+        for block in shared_blocks:
+            block.close()
+            block.unlink()
 
     print("\n--- Weighted Historical Squad Data Only Model Results (NO ELO) ---")
-    display_results(qual_counts, summed_team_stats, NUM_SIMULATIONS)
\ No newline at end of file
+    display_results(agg, NUM_SIMULATIONS)
+    display_distributions(agg, NUM_SIMULATIONS)
\ No newline at end of file
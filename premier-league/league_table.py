@@ -0,0 +1,51 @@
+import numpy as np
+
+# --- Vectorized League Table Ranking ---
+# Shared by the Premier League simulators. Tables are ranked for a whole batch of seasons at
+# once: (Pts, GD, GF) is packed into one integer per team and a single stable argsort per
+# batch replaces the per-season tuple sort and the Python position loop.
+
+NUM_CL_LEAGUE_SPOTS = 5 # Top 5 qualify for Champions League; 6th gets EL, 7th gets ECL
+
+# Bit layout of the packed key, most significant first: Pts | GD (offset) | GF
+_FIELD_BITS = 21
+_GD_OFFSET = 1 << (_FIELD_BITS - 1)
+
+def packed_sort_key(points, goal_difference, goals_for):
+    """
+    Packs (Pts, GD, GF) into one int64 per team; comparing keys compares the tuples.
+    Valid while Pts and GF stay below 2**21 and |GD| below 2**20.
+    """
+    points = np.asarray(points, dtype=np.int64)
+    goal_difference = np.asarray(goal_difference, dtype=np.int64)
+    goals_for = np.asarray(goals_for, dtype=np.int64)
+    return (points << (2 * _FIELD_BITS)) | ((goal_difference + _GD_OFFSET) << _FIELD_BITS) | goals_for
+
+def rank_tables(points, goal_difference, goals_for):
+    """
+    Ranks a batch of league tables by points, then goal difference, then goals for.
+    Inputs are (seasons, teams) arrays. Returns (order, positions):
+    order[s, p] is the team index in position p (0 = champions) and positions[s, t] is
+    team t's 0-based final position. Fully tied teams keep their team-index order.
+    """
+    key = packed_sort_key(points, goal_difference, goals_for)
+    order = np.argsort(-key, axis=-1, kind="stable")
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(order.shape[-1]), axis=-1)
+    return order, positions
+
+def european_places(positions, num_cl_spots=NUM_CL_LEAGUE_SPOTS):
+    """
+    Turns final positions into per-team qualification flags for a batch of seasons.
+    Returns a dict of (seasons, teams) bool arrays: Title, CL, EL, ECL and Overall.
+    """
+    cl = positions < num_cl_spots
+    el = positions == num_cl_spots # Next spot for EL
+    ecl = positions == num_cl_spots + 1 # Next spot for ECL
+    return {
+        "Title": positions == 0,
+        "CL": cl,
+        "EL": el,
+        "ECL": ecl,
+        "Overall": cl | el | ecl,
+    }
@@ -1,7 +1,8 @@
-import random
-from collections import defaultdict
 from tqdm import tqdm
 import math
+import numpy as np
+import outcome_sampler
+from outcome_sampler import sample_scorelines, probability_table
 
 # --- Data Setup ---
 
@@ -176,204 +177,276 @@ remaining_group_fixtures = [
 
 ]
 
-# Generate all possible group matches to compare against already played matches
-all_group_matches = []
-for group_name, teams_data in current_group_standings.items():
-    teams_in_group = list(teams_data.keys())
-    for i in range(len(teams_in_group)):
-        for j in range(i + 1, len(teams_in_group)):
-            team1 = teams_in_group[i]
-            team2 = teams_in_group[j]
-            all_group_matches.append(tuple(sorted((team1, team2)))) # Use sorted tuple for unique match pair
-
-# This set stores matches already implicitly played (or those in the fixed September fixtures)
-# Based on the given standings, each team has played 6 matches (or 4-5 in Group E).
-# A 6-team group plays 10 matches total per team. A 5-team group plays 8 matches total per team.
-# This means for a 6-team group, each team still has 4 matches left (10 total - 6 played).
-# For Group E (5 teams), Morocco/Tanzania/Zambia/Congo played 5, Niger played 4.
-# So, Morocco/Tanzania/Zambia/Congo have 3 matches left (8 total - 5 played). Niger has 4 matches left (8 total - 4 played).
-
-# Let's generate the complete set of fixtures required for the round robin and then filter.
-full_round_robin_fixtures = []
-for group_name, teams_data in current_group_standings.items():
-    teams = list(teams_data.keys())
-    for i in range(len(teams)):
-        for j in range(i + 1, len(teams)):
-            full_round_robin_fixtures.append((teams[i], teams[j])) # Home fixture
-            full_round_robin_fixtures.append((teams[j], teams[i])) # Away fixture
-
-# The `remaining_group_fixtures` from search results are specific for Sept 3/6.
-# We need to consider all matches required to get to 10 (or 8) matches per team.
-# This part is the most complex as I don't have explicit MD7-10 fixtures.
-# I will simulate the "remaining" matches by iterating until all teams have played 10 (or 8) matches.
+# --- Round-Robin Completion ---
+# Only the September fixtures are known, so the rest of each double round robin is inferred from
+# the standings, once, before simulating: every team must end on 2 * (teams - 1) matches, each
+# ordered (home, away) pairing is played once, and the known fixtures are part of what remains.
+# A small backtracking search picks a set of unplayed fixtures meeting all of that, preferring
+# opponents a team has not already got left and keeping home and away games balanced.
+
+def complete_group_round_robin(group_name, group_data, known_fixtures):
+    """
+    Returns the group's remaining (home, away) fixtures: the known ones, then a completion that
+    brings every team to a full double round robin. Raises ValueError if none is consistent.
+    """
+    teams = list(group_data)
+    matches_left = {team: (len(teams) - 1) * 2 - data['matches_played'] for team, data in group_data.items()}
+    home_balance = dict.fromkeys(teams, 0) # Home minus away games among the chosen fixtures
+    fixtures = []
+
+    def add(home_team, away_team, step):
+        matches_left[home_team] -= step
+        matches_left[away_team] -= step
+        home_balance[home_team] += step
+        home_balance[away_team] -= step
+
+    for home_team, away_team in known_fixtures:
+        if (home_team, away_team) in fixtures:
+            raise ValueError(f"{group_name}: fixture {home_team} v {away_team} is listed twice")
+        fixtures.append((home_team, away_team))
+        add(home_team, away_team, 1)
+    if any(left < 0 for left in matches_left.values()) or sum(matches_left.values()) % 2:
+        raise ValueError(f"{group_name}: matches played and known fixtures do not fit a double round robin")
+
+    def extend():
+        if not any(matches_left.values()):
+            return True
+        team = max(teams, key=lambda t: matches_left[t]) # Most constrained team first
+        opponents = sorted((t for t in teams if t != team and matches_left[t] > 0),
+                           key=lambda t: (((team, t) in fixtures) + ((t, team) in fixtures), -matches_left[t]))
+        for opponent in opponents:
+            pairings = [(team, opponent), (opponent, team)]
+            if home_balance[team] > home_balance[opponent]:
+                pairings.reverse()
+            for pairing in pairings:
+                if pairing not in fixtures:
+                    fixtures.append(pairing)
+                    add(*pairing, 1)
+                    if extend():
+                        return True
+                    add(*pairing, -1)
+                    fixtures.pop()
+        return False
+
+    if not extend():
+        raise ValueError(f"{group_name}: no round-robin completion matches the standings")
+    return fixtures
+
+def complete_round_robin(group_standings, known_fixtures):
+    """Returns every group's remaining (home, away) fixtures, inferred from the standings (see above)."""
+    team_group = {team: group_name for group_name, group_data in group_standings.items() for team in group_data}
+    for home_team, away_team in known_fixtures:
+        if team_group.get(home_team) is None or team_group.get(home_team) != team_group.get(away_team):
+            raise ValueError(f"Fixture {home_team} v {away_team} is not between two teams of one group")
+    return [fixture for group_name, group_data in group_standings.items()
+            for fixture in complete_group_round_robin(group_name, group_data,
+                                                      [f for f in known_fixtures if team_group[f[0]] == group_name])]
+
+# --- Group Arrays ---
+# Standings are held in one (groups x teams x STANDING_FIELDS) int array. Group E has five teams,
+# so its sixth row is padding. Fixtures are resolved once to (group, home idx, away idx) rows of
+# that array, so simulating a match needs no dictionary searching.
+STANDING_FIELDS = ['points', 'gd', 'gs', 'matches_played']
+POINTS, GD, GS, MP = range(len(STANDING_FIELDS))
+
+def build_group_arrays(group_standings):
+    """Returns (group names, team names per group, standings array) for a standings dict."""
+    group_names = list(group_standings)
+    group_teams = [list(group_data) for group_data in group_standings.values()]
+    standings = np.zeros((len(group_names), max(len(teams) for teams in group_teams), len(STANDING_FIELDS)), dtype=np.int64)
+    for g, group_data in enumerate(group_standings.values()):
+        for t, data in enumerate(group_data.values()):
+            standings[g, t] = [data[field] for field in STANDING_FIELDS]
+    return group_names, group_teams, standings
+
+def resolve_fixtures(fixtures, group_teams):
+    """
+    Resolves (home, away) team-name fixtures to an int array of (group, home idx, away idx) rows.
+    Fixtures whose teams are not in the same group are dropped.
+    """
+    team_position = {team: (g, t) for g, teams in enumerate(group_teams) for t, team in enumerate(teams)}
+    triples = []
+    for home_team, away_team in fixtures:
+        if home_team in team_position and away_team in team_position:
+            (home_group, home_idx), (away_group, away_idx) = team_position[home_team], team_position[away_team]
+            if home_group == away_group:
+                triples.append((home_group, home_idx, away_idx))
+    return np.array(triples, dtype=np.intp).reshape(-1, 3)
+
+def fixture_incidence(groups, slots, standings_shape):
+    """One-hot (fixtures x group-team slots) matrix: entry [f, g * teams + t] is 1 when slot (g, t) plays in fixture f."""
+    num_groups, num_slots = standings_shape[:2]
+    onehot = np.zeros((len(groups), num_groups * num_slots), dtype=np.int64)
+    onehot[np.arange(len(groups)), groups * num_slots + slots] = 1
+    return onehot
 
 # --- Helper Functions (same as CONCACAF, generally applicable) ---
 
-def predict_match_outcome(home_team, away_team):
-    home_rank_points = team_strengths.get(home_team, 800) # Default lower value for unranked teams
-    away_rank_points = team_strengths.get(away_team, 800)
-
-    strength_diff = home_rank_points - away_rank_points
-
-    # Probabilities adjusted for home advantage and strength difference
-    prob_home_win = 1 / (1 + 10**((away_rank_points - home_rank_points + 50) / 400)) # Add 50 for home advantage
-    prob_draw = 0.25
-    prob_away_win = 1 - prob_home_win - prob_draw
-
-    # Ensure probabilities are positive and sum to 1
-    if prob_away_win < 0:
-        prob_draw += prob_away_win
-        prob_away_win = 0
-    if prob_home_win < 0:
-        prob_draw += prob_home_win
-        prob_home_win = 0
-
-    total_prob = prob_home_win + prob_draw + prob_away_win
-    if total_prob <= 0:
-        prob_home_win, prob_draw, prob_away_win = 1/3, 1/3, 1/3
-    else:
-        prob_home_win /= total_prob
-        prob_draw /= total_prob
-        prob_away_win /= total_prob
-
-    outcome = random.choices(['home_win', 'draw', 'away_win'],
-                             weights=[prob_home_win, prob_draw, prob_away_win], k=1)[0]
-
-    home_goals, away_goals = 0, 0
-
-    # More nuanced goal prediction
-    if outcome == 'home_win':
-        home_goals = random.randint(1, 3) + max(0, round(strength_diff / 300))
-        away_goals = random.randint(0, max(0, home_goals - 1))
-        home_goals = max(1, home_goals)
-        away_goals = max(0, away_goals)
-        if home_goals <= away_goals: home_goals = away_goals + random.choice([1, 2])
-    elif outcome == 'away_win':
-        away_goals = random.randint(1, 3) + max(0, round(-strength_diff / 300))
-        home_goals = random.randint(0, max(0, away_goals - 1))
-        away_goals = max(1, away_goals)
-        home_goals = max(0, home_goals)
-        if away_goals <= home_goals: away_goals = home_goals + random.choice([1, 2])
-    else:  # Draw
-        max_goals = random.randint(0, 2) + round((home_rank_points + away_rank_points) / 3000)
-        home_goals = max(0, max_goals)
-        away_goals = max(0, max_goals)
-        if home_goals != away_goals:
-            home_goals = away_goals = max(home_goals, away_goals)
-            if home_goals == 0:
-                home_goals = away_goals = random.randint(1,2)
-
-    return home_goals, away_goals
-
-def calculate_group_standings(group_data):
-    sorted_teams = sorted(group_data.items(),
-                          key=lambda item: (item[1]['points'], item[1]['gd'], item[1]['gs'], team_strengths.get(item[0], 0)),
-                          reverse=True)
-    return sorted_teams
+# CAF match model for the shared sampler (outcome_sampler.py): Elo with +50 for the home side and
+# a flat 25% draw share; winners get a bonus goal per 300 points of strength difference.
+CAF_MATCH_MODEL = {
+    'probabilities': 'elo', 'home_advantage': 50, 'draw_prob': 0.25,
+    'win_goals': 3, 'margin_scale': 300, 'negative_margin': False,
+    'draw_goals': 2, 'draw_scale': 3000, 'replay_goalless_draw': False,
+}
+
+def get_match_rating(team_name):
+    return team_strengths.get(team_name, 800) # Default lower value for unranked teams
+
+def match_ratings(group_standings):
+    """Match ratings for every rated team and every group team, for the pairwise probability table."""
+    teams = list(team_strengths) + [team for group in group_standings.values() for team in group if team not in team_strengths]
+    return {team: get_match_rating(team) for team in teams}
 
 def get_team_rank_points(team_name):
     return team_strengths.get(team_name, 0) # Use 0 for unranked teams, they'd be lowest
 
+# --- Batched Group Ranking ---
+# All groups of a block of simulations are ranked in one pass. (points, gd, gs, ranking points)
+# is packed into one int64 per team, so a single stable argsort gives every group order, and the
+# group winners, runners-up and best runners-up are all read from that one result.
+SIM_BLOCK_SIZE = 1000 # Simulations ranked together
+NUM_BEST_RUNNERS_UP = 4
+_KEY_BITS = 15 # Bits per packed field
+_GD_OFFSET = 1 << (_KEY_BITS - 1)
+
+def rank_point_ordinals(group_teams):
+    """
+    Returns a (groups x teams) array of dense ordinals of each team's ranking points, so comparing
+    ordinals compares ranking points. Padding slots get -1.
+    """
+    distinct_points = sorted({get_team_rank_points(team) for teams in group_teams for team in teams})
+    ordinal = {points: i for i, points in enumerate(distinct_points)}
+    ordinals = np.full((len(group_teams), max(len(teams) for teams in group_teams)), -1, dtype=np.int64)
+    for g, teams in enumerate(group_teams):
+        ordinals[g, :len(teams)] = [ordinal[get_team_rank_points(team)] for team in teams]
+    return ordinals
+
+def standings_sort_key(standings, ordinals):
+    """Packs (points, gd, gs, ranking points) into one int64 per team; padding slots get -1."""
+    key = ((standings[..., POINTS] << (3 * _KEY_BITS))
+           | ((standings[..., GD] + _GD_OFFSET) << (2 * _KEY_BITS))
+           | (standings[..., GS] << _KEY_BITS)
+           | ordinals)
+    return np.where(ordinals >= 0, key, -1)
+
+def rank_caf_groups(standings, ordinals, num_best_runners_up=NUM_BEST_RUNNERS_UP):
+    """
+    Ranks every group of a block of simulations by points, GD, GS, then ranking points (ties keep group order).
+    standings is (sims x groups x teams x fields). Returns (order, best_runners_up):
+    order[s, g] lists group g's team indices by final position, and best_runners_up[s] lists the
+    groups whose runners-up are the best num_best_runners_up, best first.
+    """
+    key = standings_sort_key(standings, ordinals)
+    order = np.argsort(-key, axis=-1, kind='stable')
+    runner_up_key = np.take_along_axis(key, order[..., 1:2], axis=-1)[..., 0]
+    best_runners_up = np.argsort(-runner_up_key, axis=-1, kind='stable')[:, :num_best_runners_up]
+    return order, best_runners_up
+
+# --- Batched CAF Play-off ---
+# The four best runners-up are drawn into two semi-finals (1st v 4th and 2nd v 3rd of a random
+# order), and the semi-final winners meet in a final. Each tie is one match hosted by the
+# higher-ranked side; a draw goes to the higher-ranked team (extra time/penalties stand-in).
+# Teams are indices into the pairwise probability table, and every tie of a block is drawn at once.
+
+def play_ranked_ties(team1, team2, ratings, rank_points, cumulative, rng=None):
+    """
+    Plays one match per (team1[i], team2[i]) tie, hosted by the higher-ranked team (team1 on equal
+    ranking points). Returns the winners' indices.
+    """
+    home = np.where(rank_points[team1] >= rank_points[team2], team1, team2)
+    away = np.where(home == team1, team2, team1)
+    home_goals, away_goals = sample_scorelines(ratings[home], ratings[away], CAF_MATCH_MODEL, rng=rng,
+                                               thresholds=cumulative[home, away])
+    draw_winner = np.where(rank_points[home] > rank_points[away], home, away)
+    return np.where(home_goals > away_goals, home, np.where(home_goals < away_goals, away, draw_winner))
+
+def simulate_caf_playoffs(playoff_teams, ratings, rank_points, cumulative, rng=None):
+    """Resolves a (simulations x 4) array of play-off teams. Returns each simulation's play-off winner."""
+    rng = rng if rng is not None else outcome_sampler.RNG
+    drawn = np.take_along_axis(playoff_teams, np.argsort(rng.random(playoff_teams.shape), axis=1), axis=1)
+    semi_final_winners = play_ranked_ties(drawn[:, [0, 1]], drawn[:, [3, 2]], ratings, rank_points, cumulative, rng)
+    return play_ranked_ties(semi_final_winners[:, 0], semi_final_winners[:, 1], ratings, rank_points, cumulative, rng)
+
+def count_caf_qualifiers(initial_group_standings, remaining_fixtures_list, num_simulations=10000, progress=True):
+    """
+    Simulates the remaining group fixtures (a complete set, see complete_round_robin) and the CAF
+    play-off. Every fixture of a block of simulations is drawn at once from fixed index arrays.
+    Returns {category: {team: count}} for 'direct', 'caf_playoff', 'interconfederation_playoff' and 'qualified'.
+    """
+    # Resolve every fixture to its group and team rows once, before the simulation loop
+    group_names, group_teams, initial_standings = build_group_arrays(initial_group_standings)
+    fixture_groups, fixture_home, fixture_away = resolve_fixtures(remaining_fixtures_list, group_teams).T
+    home_onehot = fixture_incidence(fixture_groups, fixture_home, initial_standings.shape)
+    away_onehot = fixture_incidence(fixture_groups, fixture_away, initial_standings.shape)
+    ordinals = rank_point_ordinals(group_teams)
+    group_ratings = np.array([[get_match_rating(team) for team in teams] + [0] * (initial_standings.shape[1] - len(teams))
+                              for teams in group_teams], dtype=float)
+    # Outcome thresholds for each fixture's pairing, read from the (rebuilt if stale) pairwise table
+    table = probability_table(match_ratings(initial_group_standings), CAF_MATCH_MODEL)
+    fixture_thresholds = np.array([table['cumulative'][table['index'][group_teams[g][h]], table['index'][group_teams[g][a]]]
+                                   for g, h, a in zip(fixture_groups, fixture_home, fixture_away)]).reshape(-1, 3)
+    # Play-off and count arrays are indexed by table row
+    table_teams = list(table['index'])
+    table_ratings = np.array([table['ratings'][team] for team in table_teams], dtype=float)
+    table_rank_points = np.array([get_team_rank_points(team) for team in table_teams], dtype=float)
+    group_rows = np.array([[table['index'][team] for team in teams] + [0] * (initial_standings.shape[1] - len(teams))
+                           for teams in group_teams], dtype=np.intp)
+    direct_counts = np.zeros(len(table_teams), dtype=np.int64)
+    playoff_counts = np.zeros(len(table_teams), dtype=np.int64) # Participation in the CAF playoff
+    interconf_counts = np.zeros(len(table_teams), dtype=np.int64) # The final CAF spot for inter-confed playoff
+
+    with tqdm(total=num_simulations, desc="Simulating CAF Qualifiers", disable=not progress) as progress_bar:
+        for block_start in range(0, num_simulations, SIM_BLOCK_SIZE):
+            block_size = min(SIM_BLOCK_SIZE, num_simulations - block_start)
+
+            # Simulate every remaining group match for every simulation in the block at once
+            home_goals, away_goals = sample_scorelines(group_ratings[fixture_groups, fixture_home],
+                                                       group_ratings[fixture_groups, fixture_away], CAF_MATCH_MODEL,
+                                                       size=(block_size, len(fixture_groups)), thresholds=fixture_thresholds)
+            draws = (home_goals == away_goals).astype(np.int64)
+            home_points = np.where(home_goals > away_goals, 3, draws)
+            away_points = np.where(away_goals > home_goals, 3, draws)
+
+            # Fold the per-fixture results into each team's row: (sims x fixtures) @ (fixtures x slots)
+            delta = np.stack([home_points @ home_onehot + away_points @ away_onehot,
+                              (home_goals - away_goals) @ (home_onehot - away_onehot),
+                              home_goals @ home_onehot + away_goals @ away_onehot,
+                              np.broadcast_to((home_onehot + away_onehot).sum(axis=0), (block_size, home_onehot.shape[1]))],
+                             axis=-1)
+            block_standings = initial_standings[None] + delta.reshape((block_size,) + initial_standings.shape)
+
+            # Rank all 9 groups of the block once: group winners (direct qualifiers), runners-up
+            # and the 4 best runners-up all come from this result
+            order, best_runners_up = rank_caf_groups(block_standings, ordinals)
+
+            placed = np.take_along_axis(np.broadcast_to(group_rows, order.shape), order, axis=-1)
+            direct_counts += np.bincount(placed[:, :, 0].reshape(-1), minlength=len(table_teams))
+
+            # Best runners-up, sorted by points, then GD, then GS, then rank
+            caf_playoff_teams = np.take_along_axis(placed[:, :, 1], best_runners_up, axis=1) # Top 4 runners-up
+            playoff_counts += np.bincount(caf_playoff_teams.reshape(-1), minlength=len(table_teams))
 
-def simulate_caf_qualifiers(initial_group_standings, remaining_fixtures_list, num_simulations=10000):
-    direct_qual_counts = defaultdict(int)
-    playoff_qual_counts = defaultdict(int)
-    interconf_playoff_counts = defaultdict(int) # This is the final CAF spot for inter-confed playoff
-
-    for _ in tqdm(range(num_simulations), desc="Simulating CAF Qualifiers"):
-        simulated_standings = {group: {team: data.copy() for team, data in group_data.items()}
-                               for group, group_data in initial_group_standings.items()}
-
-        # Simulate remaining group matches
-        for home_team, away_team in remaining_fixtures_list:
-            group_name = None
-            for g_name, teams_in_group in simulated_standings.items():
-                if home_team in teams_in_group and away_team in teams_in_group:
-                    group_name = g_name
-                    break
-            if not group_name:
-                continue
-
-            # Ensure match is actually remaining for these teams based on matches_played
-            team_count_in_group = len(simulated_standings[group_name])
-            max_matches = (team_count_in_group - 1) * 2 # Round robin, home & away
-
-            if simulated_standings[group_name][home_team]['matches_played'] < max_matches and \
-               simulated_standings[group_name][away_team]['matches_played'] < max_matches:
-
-                home_goals, away_goals = predict_match_outcome(home_team, away_team)
-
-                if home_goals > away_goals:
-                    simulated_standings[group_name][home_team]['points'] += 3
-                elif home_goals < away_goals:
-                    simulated_standings[group_name][away_team]['points'] += 3
-                else:
-                    simulated_standings[group_name][home_team]['points'] += 1
-                    simulated_standings[group_name][away_team]['points'] += 1
-
-                simulated_standings[group_name][home_team]['gd'] += (home_goals - away_goals)
-                simulated_standings[group_name][away_team]['gd'] += (away_goals - home_goals)
-                simulated_standings[group_name][home_team]['gs'] += home_goals
-                simulated_standings[group_name][away_team]['gs'] += away_goals
-                simulated_standings[group_name][home_team]['matches_played'] += 1
-                simulated_standings[group_name][away_team]['matches_played'] += 1
-
-
-        # Determine 9 Group Winners (Direct Qualifiers)
-        group_winners = []
-        for group_name, data in simulated_standings.items():
-            final_group_order = calculate_group_standings(data)
-            if final_group_order:
-                group_winners.append(final_group_order[0][0])
-                direct_qual_counts[final_group_order[0][0]] += 1
-
-        # Determine 4 Best Runners-Up for CAF Playoff
-        all_runners_up = []
-        for group_name, data in simulated_standings.items():
-            final_group_order = calculate_group_standings(data)
-            if len(final_group_order) > 1: # Ensure there's a runner-up
-                runner_up_team = final_group_order[1][0]
-                runner_up_data = final_group_order[1][1].copy()
-                runner_up_data['team'] = runner_up_team
-                all_runners_up.append(runner_up_data)
-
-        # Sort runners-up by points, then GD, then GS, then rank
-        sorted_runners_up = sorted(all_runners_up,
-                                   key=lambda x: (x['points'], x['gd'], x['gs'], get_team_rank_points(x['team'])),
-                                   reverse=True)
-
-        caf_playoff_teams = [ru['team'] for ru in sorted_runners_up[:4]] # Top 4 runners-up
-
-        # Simulate CAF Play-off Tournament
-        if len(caf_playoff_teams) == 4:
-            # Semi-finals (Random draw among them, or based on ranking? Let's do random for simplicity)
-            random.shuffle(caf_playoff_teams)
-            sf1_teams = (caf_playoff_teams[0], caf_playoff_teams[3]) # Higher vs lower based on shuffled list
-            sf2_teams = (caf_playoff_teams[1], caf_playoff_teams[2])
-
-            sf1_home_goals, sf1_away_goals = predict_match_outcome(*sf1_teams)
-            sf2_home_goals, sf2_away_goals = predict_match_outcome(*sf2_teams)
-
-            sf1_winner = sf1_teams[0] if sf1_home_goals > sf1_away_goals else sf1_teams[1]
-            sf2_winner = sf2_teams[0] if sf2_home_goals > sf2_away_goals else sf2_teams[1]
-
-            # If draws are possible, they'd go to extra time/penalties. For simulation, a draw means the higher-ranked team wins.
-            if sf1_home_goals == sf1_away_goals:
-                sf1_winner = sf1_teams[0] if get_team_rank_points(sf1_teams[0]) > get_team_rank_points(sf1_teams[1]) else sf1_teams[1]
-            if sf2_home_goals == sf2_away_goals:
-                sf2_winner = sf2_teams[0] if get_team_rank_points(sf2_teams[0]) > get_team_rank_points(sf2_teams[1]) else sf2_teams[1]
-
-            # Final
-            final_teams = (sf1_winner, sf2_winner)
-            final_home_goals, final_away_goals = predict_match_outcome(*final_teams)
-            caf_playoff_winner = final_teams[0] if final_home_goals > final_away_goals else final_teams[1]
-            if final_home_goals == final_away_goals:
-                caf_playoff_winner = final_teams[0] if get_team_rank_points(final_teams[0]) > get_team_rank_points(final_teams[1]) else final_teams[1]
-
-            interconf_playoff_counts[caf_playoff_winner] += 1
-
-            for team in caf_playoff_teams:
-                playoff_qual_counts[team] += 1 # Count participation in CAF playoff
+            # Simulate CAF Play-off Tournament
+            caf_playoff_winners = simulate_caf_playoffs(caf_playoff_teams, table_ratings, table_rank_points, table['cumulative'])
+            interconf_counts += np.bincount(caf_playoff_winners, minlength=len(table_teams))
+
+            progress_bar.update(block_size)
+
+    def by_team(counts):
+        return {table_teams[t]: int(count) for t, count in enumerate(counts) if count}
+
+    return {
+        'direct': by_team(direct_counts),
+        'caf_playoff': by_team(playoff_counts),
+        'interconfederation_playoff': by_team(interconf_counts),
+        'qualified': by_team(direct_counts + interconf_counts), # Direct OR Inter-confederation Playoff spot
+    }
+
+def print_caf_results(counts, num_simulations):
+    direct_qual_counts = counts['direct']
+    playoff_qual_counts = counts['caf_playoff']
+    interconf_playoff_counts = counts['interconfederation_playoff']
 
     print(f"\n--- CAF World Cup 2026 Qualification Simulation Results ({num_simulations} runs) ---")
     print(f"**Note:** This simulation uses current Group Stage standings (Matchday 6 completed) and simulates remaining group matches (MD 7-10) and CAF Playoff.")
@@ -395,210 +468,22 @@ def simulate_caf_qualifiers(initial_group_standings, remaining_fixtures_list, nu
         print(f"{team}: {count / num_simulations:.2%}")
 
     print("\nOverall Probability of Qualification (Direct OR Inter-confederation Playoff spot):")
-    overall_qual_probabilities = defaultdict(float)
-    for team, count in direct_qual_counts.items():
-        overall_qual_probabilities[team] += count / num_simulations
-    for team, count in interconf_playoff_counts.items():
-        overall_qual_probabilities[team] += count / num_simulations
+    sorted_overall = sorted(counts['qualified'].items(), key=lambda item: (-item[1], item[0]))
+    for team, count in sorted_overall:
+        print(f"{team}: {count / num_simulations:.2%}")
+
+def simulate_caf_qualifiers(initial_group_standings, remaining_fixtures_list, num_simulations=10000):
+    print_caf_results(count_caf_qualifiers(initial_group_standings, remaining_fixtures_list, num_simulations), num_simulations)
 
-    sorted_overall = sorted(overall_qual_probabilities.items(), key=lambda item: (-item[1], item[0]))
-    for team, chance in sorted_overall:
-        print(f"{team}: {chance:.2%}")
+def count_qualification(num_simulations=10000, progress=True):
+    """Runner hook (see run_qualifiers.py): counts for the current standings and inferred remaining fixtures."""
+    remaining_fixtures = complete_round_robin(current_group_standings, remaining_group_fixtures)
+    return count_caf_qualifiers(current_group_standings, remaining_fixtures, num_simulations, progress)
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    # To handle the remaining fixtures dynamically for 10 (or 8) matches per team:
-    # We first calculate how many matches each team still needs to play.
-    # Then we generate all possible remaining home-away pairs within each group.
-    # We shuffle these to simulate matchday progression.
-
-    dynamic_remaining_fixtures = []
-    for group_name, teams_data in current_group_standings.items():
-        teams_in_group = list(teams_data.keys())
-        expected_matches = (len(teams_in_group) - 1) * 2 # Total matches for a round-robin
-
-        # Create all home-away pairs for the group
-        group_possible_fixtures = []
-        for i in range(len(teams_in_group)):
-            for j in range(len(teams_in_group)):
-                if i != j:
-                    group_possible_fixtures.append((teams_in_group[i], teams_in_group[j]))
-
-        # For simulation, we need to add the *remaining* fixtures.
-        # Given the current standings, matches_played goes up to 6.
-        # We know there are 4 more matchdays (7, 8, 9, 10). Each matchday involves 2 games per team in a 6-team group.
-        # So each team should play 4 more matches. This means 4 * 0.5 * (N teams in group) = 4 * 0.5 * 6 = 12 matches per group remaining.
-        # In a 6-team group, there are 15 unique match pairings. Each pair plays twice (home/away) = 30 total matches.
-        # If 6 matchdays have passed, each team played 6 games. This means 6 * 0.5 * 6 = 18 matches played per group.
-        # So 30 - 18 = 12 matches remain per group.
-        # For a 5-team group, (5-1)*2 = 8 matches per team total. (5*4)/2 = 10 unique match pairings. 20 total matches.
-        # Group E: Morocco/Tanzania/Zambia/Congo played 5. Niger played 4.
-        # This implies: 5*0.5*5 = 12.5 matches (rounded, approx 12-13) played.
-        # Total matches in 5-team group = 20. Remaining = 7-8.
-
-        # A simpler way to handle remaining fixtures without exact dates:
-        # For each group, determine all possible match pairs.
-        # Simulate matches until each team in the group has played the `expected_matches`.
-        # This approach ensures the full round-robin is completed.
-
-        # This will be done *inside* the simulation loop for each group to ensure random order of remaining games.
-
-    # Reworking `simulate_caf_qualifiers` to dynamically determine remaining matches per simulation.
-    # The `remaining_fixtures_list` parameter will no longer be pre-populated for ALL groups.
-    # Instead, each simulation will track `matches_played` for each team and determine which fixtures are outstanding.
-
-    def simulate_caf_qualifiers_dynamic_fixtures(initial_group_standings, num_simulations=10000):
-        direct_qual_counts = defaultdict(int)
-        playoff_qual_counts = defaultdict(int)
-        interconf_playoff_counts = defaultdict(int)
-
-        for _ in tqdm(range(num_simulations), desc="Simulating CAF Qualifiers"):
-            simulated_standings = {group: {team: data.copy() for team, data in group_data.items()}
-                                   for group, group_data in initial_group_standings.items()}
-
-            # Track matches played for each team within the current simulation
-            current_matches_played = {group: {team: data['matches_played'] for team, data in group_data.items()}
-                                      for group, group_data in simulated_standings.items()}
-
-            # Simulate remaining group matches for all groups
-            for group_name, teams_data in simulated_standings.items():
-                teams_in_group = list(teams_data.keys())
-                max_group_matches_per_team = (len(teams_in_group) - 1) * 2
-
-                # Generate all possible home-away fixtures for this group
-                all_possible_group_fixtures = []
-                for i in range(len(teams_in_group)):
-                    for j in range(len(teams_in_group)):
-                        if i != j:
-                            all_possible_group_fixtures.append((teams_in_group[i], teams_in_group[j]))
-                random.shuffle(all_possible_group_fixtures) # Shuffle order of matches
-
-                # Simulate until each team has played their full complement of matches
-                for home_team, away_team in all_possible_group_fixtures:
-                    if current_matches_played[group_name][home_team] < max_group_matches_per_team and \
-                       current_matches_played[group_name][away_team] < max_group_matches_per_team:
-
-                        home_goals, away_goals = predict_match_outcome(home_team, away_team)
-
-                        if home_goals > away_goals:
-                            simulated_standings[group_name][home_team]['points'] += 3
-                        elif home_goals < away_goals:
-                            simulated_standings[group_name][away_team]['points'] += 3
-                        else:
-                            simulated_standings[group_name][home_team]['points'] += 1
-                            simulated_standings[group_name][away_team]['points'] += 1
-
-                        simulated_standings[group_name][home_team]['gd'] += (home_goals - away_goals)
-                        simulated_standings[group_name][away_team]['gd'] += (away_goals - home_goals)
-                        simulated_standings[group_name][home_team]['gs'] += home_goals
-                        simulated_standings[group_name][away_team]['gs'] += away_goals
-                        simulated_standings[group_name][home_team]['matches_played'] += 1
-                        simulated_standings[group_name][away_team]['matches_played'] += 1
-
-                        # Update the tracker for this simulation
-                        current_matches_played[group_name][home_team] += 1
-                        current_matches_played[group_name][away_team] += 1
-
-            # Determine 9 Group Winners (Direct Qualifiers)
-            group_winners = []
-            for group_name, data in simulated_standings.items():
-                final_group_order = calculate_group_standings(data)
-                if final_group_order:
-                    group_winners.append(final_group_order[0][0])
-                    direct_qual_counts[final_group_order[0][0]] += 1
-
-            # Determine 4 Best Runners-Up for CAF Playoff
-            all_runners_up = []
-            for group_name, data in simulated_standings.items():
-                final_group_order = calculate_group_standings(data)
-                if len(final_group_order) > 1:
-                    runner_up_team = final_group_order[1][0]
-                    runner_up_data = final_group_order[1][1].copy()
-                    runner_up_data['team'] = runner_up_team
-                    all_runners_up.append(runner_up_data)
-
-            # Sort runners-up by points, then GD, then GS, then rank
-            sorted_runners_up = sorted(all_runners_up,
-                                       key=lambda x: (x['points'], x['gd'], x['gs'], get_team_rank_points(x['team'])),
-                                       reverse=True)
-
-            caf_playoff_teams = [ru['team'] for ru in sorted_runners_up[:4]]
-
-            # Simulate CAF Play-off Tournament
-            if len(caf_playoff_teams) == 4:
-                # Random draw for semi-finals from the 4 teams
-                random.shuffle(caf_playoff_teams)
-                sf_pairings = [(caf_playoff_teams[0], caf_playoff_teams[3]), (caf_playoff_teams[1], caf_playoff_teams[2])]
-
-                sf_winners = []
-                for team1, team2 in sf_pairings:
-                    # To determine home/away for this 1-off match, let's use the higher ranked team as home
-                    if get_team_rank_points(team1) >= get_team_rank_points(team2):
-                        home_sf_team, away_sf_team = team1, team2
-                    else:
-                        home_sf_team, away_sf_team = team2, team1
-
-                    home_goals, away_goals = predict_match_outcome(home_sf_team, away_sf_team)
-
-                    if home_goals > away_goals:
-                        sf_winners.append(home_sf_team)
-                    elif home_goals < away_goals:
-                        sf_winners.append(away_sf_team)
-                    else: # Draw, higher ranked team wins
-                        sf_winners.append(home_sf_team if get_team_rank_points(home_sf_team) > get_team_rank_points(away_sf_team) else away_sf_team)
-
-                # Final
-                final_teams_for_match = (sf_winners[0], sf_winners[1])
-                # Again, higher ranked team as home
-                if get_team_rank_points(final_teams_for_match[0]) >= get_team_rank_points(final_teams_for_match[1]):
-                    home_final_team, away_final_team = final_teams_for_match[0], final_teams_for_match[1]
-                else:
-                    home_final_team, away_final_team = final_teams_for_match[1], final_teams_for_match[0]
-
-                final_home_goals, final_away_goals = predict_match_outcome(home_final_team, away_final_team)
-
-                if final_home_goals > final_away_goals:
-                    caf_playoff_winner = home_final_team
-                elif final_home_goals < final_away_goals:
-                    caf_playoff_winner = away_final_team
-                else: # Draw, higher ranked team wins
-                    caf_playoff_winner = home_final_team if get_team_rank_points(home_final_team) > get_team_rank_points(away_final_team) else away_final_team
-
-                interconf_playoff_counts[caf_playoff_winner] += 1
-
-                for team in caf_playoff_teams:
-                    playoff_qual_counts[team] += 1 # Count participation in CAF playoff
-
-        print(f"\n--- CAF World Cup 2026 Qualification Simulation Results ({num_simulations} runs) ---")
-        print(f"**Note:** This simulation uses current Group Stage standings (after Matchday 6) and dynamically simulates remaining group matches (MD 7-10) and the CAF Playoff.")
-        print(f"9 Group Winners qualify directly. 4 Best Runners-Up enter CAF Playoff. Winner of CAF Playoff enters Inter-confederation Playoff.")
-
-        print("\nProbability of Direct Qualification (Group Winner):")
-        sorted_direct = sorted(direct_qual_counts.items(), key=lambda item: (-item[1], item[0]))
-        for team, count in sorted_direct:
-            print(f"{team}: {count / num_simulations:.2%}")
-
-        print("\nProbability of entering CAF Playoff (Top 4 Runners-Up):")
-        sorted_playoff_entry = sorted(playoff_qual_counts.items(), key=lambda item: (-item[1], item[0]))
-        for team, count in sorted_playoff_entry:
-            print(f"{team}: {count / num_simulations:.2%}")
-
-        print("\nProbability of advancing to Inter-confederation Playoff (Winner of CAF Playoff):")
-        sorted_interconf_playoff = sorted(interconf_playoff_counts.items(), key=lambda item: (-item[1], item[0]))
-        for team, count in sorted_interconf_playoff:
-            print(f"{team}: {count / num_simulations:.2%}")
-
-        print("\nOverall Probability of Qualification (Direct OR Inter-confederation Playoff spot):")
-        overall_qual_probabilities = defaultdict(float)
-        for team, count in direct_qual_counts.items():
-            overall_qual_probabilities[team] += count / num_simulations
-        for team, count in interconf_playoff_counts.items():
-            overall_qual_probabilities[team] += count / num_simulations
-
-        sorted_overall = sorted(overall_qual_probabilities.items(), key=lambda item: (-item[1], item[0]))
-        for team, chance in sorted_overall:
-            print(f"{team}: {chance:.2%}")
-
+    # Infer the remaining fixtures (known September ones plus a consistent completion) once
+    remaining_fixtures = complete_round_robin(current_group_standings, remaining_group_fixtures)
 
     # Call the main simulation function
-    simulate_caf_qualifiers_dynamic_fixtures(current_group_standings, num_simulations=10000)
+    simulate_caf_qualifiers(current_group_standings, remaining_fixtures, num_simulations=10000)
@@ -1,7 +1,7 @@
-import random
 from collections import defaultdict
 
 from tqdm import tqdm
+from outcome_sampler import sample_scoreline, probability_table, table_thresholds
 
 # Updated team strengths based on FIFA rankings (May 6, 2025 data from Sofascore/FIFA)
 team_strengths = {
@@ -55,66 +55,17 @@ remaining_fixtures = [
     ('Peru', 'Paraguay')
 ]
 
+# CONMEBOL match model for the shared sampler (outcome_sampler.py): base 45/25/30 probabilities
+# shifted linearly by the strength difference; the stronger winner gets a bonus goal per 400 points.
+CONMEBOL_MATCH_MODEL = {
+    'probabilities': 'linear', 'base_probs': (0.45, 0.25, 0.30), 'win_slope': 0.0005, 'draw_slope': 0.00025,
+    'win_goals': 3, 'margin_scale': 400, 'negative_margin': False,
+    'draw_goals': 2, 'draw_scale': 3000, 'replay_goalless_draw': False,
+}
+
 def predict_match_outcome(home_team, away_team):
-    home_rank_points = team_strengths.get(home_team, 1000)
-    away_rank_points = team_strengths.get(away_team, 1000)
-
-    strength_diff = home_rank_points - away_rank_points
-
-    base_home_win_prob = 0.45
-    base_draw_prob = 0.25
-    base_away_win_prob = 0.30
-
-    home_win_prob = base_home_win_prob + (strength_diff * 0.0005)
-    away_win_prob = base_away_win_prob - (strength_diff * 0.0005)
-    draw_prob = base_draw_prob - abs(strength_diff) * 0.00025
-
-    # Clip probabilities to be within a reasonable range and re-normalize
-    home_win_prob = max(0.05, min(0.95, home_win_prob))
-    away_win_prob = max(0.05, min(0.95, away_win_prob))
-    draw_prob = max(0.05, min(0.95, draw_prob))
-
-    total_prob = home_win_prob + draw_prob + away_win_prob
-    if total_prob == 0: # Avoid division by zero in extreme cases
-        home_win_prob = draw_prob = away_win_prob = 1/3
-    else:
-        home_win_prob /= total_prob
-        draw_prob /= total_prob
-        away_win_prob /= total_prob
-
-    outcome = random.choices(['home_win', 'draw', 'away_win'],
-                             weights=[home_win_prob, draw_prob, away_win_prob], k=1)[0]
-
-    # Goal prediction (simplified)
-    # Stronger team gets a higher chance of scoring more goals
-    home_goals = 0
-    away_goals = 0
-
-    if outcome == 'home_win':
-        home_goals = random.randint(1, 3) + max(0, round(strength_diff / 400))
-        away_goals = random.randint(0, max(0, home_goals - 1))
-        home_goals = max(1, home_goals)
-        away_goals = max(0, away_goals)
-        if home_goals <= away_goals: # Ensure home team wins
-            home_goals = away_goals + random.choice([1,2])
-    elif outcome == 'away_win':
-        away_goals = random.randint(1, 3) + max(0, round(-strength_diff / 400))
-        home_goals = random.randint(0, max(0, away_goals - 1))
-        away_goals = max(1, away_goals)
-        home_goals = max(0, home_goals)
-        if away_goals <= home_goals: # Ensure away team wins
-            away_goals = home_goals + random.choice([1,2])
-    else:  # Draw
-        goals = random.randint(0, 2) + round((home_rank_points + away_rank_points) / 3000)
-        home_goals = max(0, goals)
-        away_goals = max(0, goals)
-        if home_goals != away_goals: # Ensure it's a draw
-            home_goals = away_goals = max(home_goals, away_goals)
-            if home_goals == 0: # Avoid 0-0 for every draw, ensure some variety
-                home_goals = away_goals = random.randint(1,2)
-
-
-    return home_goals, away_goals
+    return sample_scoreline(team_strengths.get(home_team, 1000), team_strengths.get(away_team, 1000), CONMEBOL_MATCH_MODEL,
+                            thresholds=table_thresholds(team_strengths, CONMEBOL_MATCH_MODEL, home_team, away_team))
 
 def calculate_standings(standings):
     sorted_teams = sorted(standings.items(),
@@ -122,12 +73,14 @@ def calculate_standings(standings):
                           reverse=True)
     return sorted_teams
 
-def simulate_tournament(initial_standings, all_fixtures, num_simulations=10000):
+def count_conmebol_qualifiers(initial_standings, all_fixtures, num_simulations=10000, progress=True):
+    """Simulates the remaining fixtures. Returns {category: {team: count}} for 'direct', 'interconfederation_playoff' and 'qualified'."""
     direct_qual_counts = defaultdict(int)
     playoff_qual_counts = defaultdict(int)
     total_qual_counts = defaultdict(int)
+    probability_table(team_strengths, CONMEBOL_MATCH_MODEL) # Pairwise outcome thresholds, rebuilt if team_strengths changed
 
-    for _ in tqdm(range(num_simulations), desc="Simulating CONMEBOL Qualifiers"):
+    for _ in tqdm(range(num_simulations), desc="Simulating CONMEBOL Qualifiers", disable=not progress):
         simulated_standings = {team: data.copy() for team, data in initial_standings.items()}
 
         for home_team, away_team in all_fixtures:
@@ -166,6 +119,17 @@ def simulate_tournament(initial_standings, all_fixtures, num_simulations=10000):
             playoff_qual_counts[playoff_team] += 1
             total_qual_counts[playoff_team] += 1 # Count for total chance to qualify
 
+    return {
+        'direct': dict(direct_qual_counts),
+        'interconfederation_playoff': dict(playoff_qual_counts),
+        'qualified': dict(total_qual_counts),
+    }
+
+def print_conmebol_results(counts, num_simulations):
+    direct_qual_counts = counts['direct']
+    playoff_qual_counts = counts['interconfederation_playoff']
+    total_qual_counts = counts['qualified']
+
     print(f"\n--- CONMEBOL World Cup 2026 Qualification Simulation Results ({num_simulations} runs) ---")
 
     print("\nProbability of Direct Qualification (Top 6):")
@@ -183,6 +147,13 @@ def simulate_tournament(initial_standings, all_fixtures, num_simulations=10000):
     for team, count in sorted_total:
         print(f"{team}: {count / num_simulations:.2%}")
 
+def simulate_tournament(initial_standings, all_fixtures, num_simulations=10000):
+    print_conmebol_results(count_conmebol_qualifiers(initial_standings, all_fixtures, num_simulations), num_simulations)
+
+def count_qualification(num_simulations=10000, progress=True):
+    """Runner hook (see run_qualifiers.py): counts for the current standings and remaining fixtures."""
+    return count_conmebol_qualifiers(current_standings, remaining_fixtures, num_simulations, progress)
+
 if __name__ == "__main__":
     simulate_tournament(current_standings, remaining_fixtures, num_simulations=10000)
 
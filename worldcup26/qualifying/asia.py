@@ -1,7 +1,8 @@
-import random
-from collections import defaultdict
 from tqdm import tqdm
 import math
+import numpy as np
+import outcome_sampler
+from outcome_sampler import sample_scorelines, probability_table
 
 # --- Data Setup ---
 
@@ -90,233 +91,191 @@ third_round_groups = {
 def get_team_rank_points(team_name):
     return team_strengths.get(team_name, 1000) # Default if team not found
 
-def predict_match_outcome(home_team, away_team, is_knockout=False):
-    home_rank_points = get_team_rank_points(home_team)
-    away_rank_points = get_team_rank_points(away_team)
-
-    # Elo-like probability calculation
-    prob_home_win = 1 / (1 + 10**((away_rank_points - home_rank_points + 60) / 400)) # Home advantage of ~60 points
-    prob_draw = 0.22 # AFC often has draws, slightly higher than OFC
-    prob_away_win = 1 - prob_home_win - prob_draw
-
-    # Ensure probabilities are valid and sum to 1
-    if prob_away_win < 0: prob_draw += prob_away_win; prob_away_win = 0
-    if prob_home_win < 0: prob_draw += prob_home_win; prob_home_win = 0
-    total_prob = prob_home_win + prob_draw + prob_away_win
-    if total_prob <= 0: prob_home_win, prob_draw, prob_away_win = 1/3, 1/3, 1/3
-    else: prob_home_win /= total_prob; prob_draw /= total_prob; prob_away_win /= total_prob
-
-    outcome = random.choices(['home_win', 'draw', 'away_win'],
-                             weights=[prob_home_win, prob_draw, prob_away_win], k=1)[0]
-
-    home_goals, away_goals = 0, 0
-    strength_diff = home_rank_points - away_rank_points
-
-    # Simplified goal prediction with some randomness
-    if outcome == 'home_win':
-        home_goals = random.randint(1, 3) + max(0, round(strength_diff / 300))
-        away_goals = random.randint(0, home_goals - 1)
-        home_goals = max(1, home_goals) # At least 1 goal for winner
-        away_goals = max(0, away_goals)
-    elif outcome == 'away_win':
-        away_goals = random.randint(1, 3) + max(0, round(-strength_diff / 300))
-        home_goals = random.randint(0, away_goals - 1)
-        away_goals = max(1, away_goals)
-        home_goals = max(0, home_goals)
-    else: # Draw
-        goals = random.randint(0, 2) + round((home_rank_points + away_rank_points) / 3000)
-        home_goals = max(0, goals)
-        away_goals = max(0, goals)
-        if home_goals != away_goals: home_goals = away_goals = max(home_goals, away_goals)
-        if home_goals == 0: home_goals = away_goals = random.randint(1,2) # Avoid too many 0-0
-
-    # For knockout matches, force a winner
-    if is_knockout and home_goals == away_goals:
-        # Simulate extra time and penalties based on higher rank
-        if home_rank_points > away_rank_points:
-            home_goals += 1
-        else:
-            away_goals += 1
-
-    return home_goals, away_goals
-
-def calculate_group_standings(group_data):
-    # Sort by points, then goal difference, then goals scored, then FIFA ranking
-    sorted_teams = sorted(group_data.items(),
-                          key=lambda item: (item[1]['points'], item[1]['gd'], item[1]['gs'], get_team_rank_points(item[0])),
-                          reverse=True)
-    return sorted_teams
-
-def simulate_group_matches(group_info, current_standings):
-    # Create a copy of current standings for this simulation run
-    sim_standings = {team: data.copy() for team, data in current_standings.items()}
-
-    for home_team, away_team in group_info['fixtures_md10']:
-        home_goals, away_goals = predict_match_outcome(home_team, away_team, is_knockout=False)
-
-        # Update standings
-        if home_goals > away_goals:
-            sim_standings[home_team]['points'] += 3
-        elif home_goals < away_goals:
-            sim_standings[away_team]['points'] += 3
-        else:
-            sim_standings[home_team]['points'] += 1
-            sim_standings[away_team]['points'] += 1
-
-        sim_standings[home_team]['gd'] += (home_goals - away_goals)
-        sim_standings[away_team]['gd'] += (away_goals - home_goals)
-        sim_standings[home_team]['gs'] += home_goals
-        sim_standings[away_team]['gs'] += away_goals
-        sim_standings[home_team]['matches_played'] += 1
-        sim_standings[away_team]['matches_played'] += 1
-
-    return sim_standings
-
-def simulate_two_legged_tie(team1, team2):
-    # Leg 1: Team 1 home
-    goals1_leg1, goals2_leg1 = predict_match_outcome(team1, team2, is_knockout=False)
-
-    # Leg 2: Team 2 home
-    goals2_leg2, goals1_leg2 = predict_match_outcome(team2, team1, is_knockout=False) # Note: Team2 is "home"
-
-    # Aggregate score
-    agg_team1 = goals1_leg1 + goals1_leg2
-    agg_team2 = goals2_leg1 + goals2_leg2
-
-    if agg_team1 > agg_team2:
-        return team1
-    elif agg_team2 > agg_team1:
-        return team2
-    else: # Aggregate score is tied, apply away goals rule (simplified: whoever scored more away goals wins)
-        if goals1_leg2 > goals2_leg1: # Team 1 scored more away goals (in Leg 2)
-            return team1
-        elif goals2_leg1 > goals1_leg2: # Team 2 scored more away goals (in Leg 1)
-            return team2
-        else: # Still tied (e.g., 0-0, 0-0 or 1-1, 1-1). Simulate penalties by higher rank.
-            return team1 if get_team_rank_points(team1) > get_team_rank_points(team2) else team2
+# AFC match model for the shared sampler (outcome_sampler.py): Elo with ~60 points of home advantage,
+# a 22% draw share (AFC often has draws, slightly higher than OFC), and goalless draws replayed as
+# 1-1 or 2-2 to avoid too many 0-0s.
+AFC_MATCH_MODEL = {
+    'probabilities': 'elo', 'home_advantage': 60, 'draw_prob': 0.22,
+    'win_goals': 3, 'margin_scale': 300, 'negative_margin': False,
+    'draw_goals': 2, 'draw_scale': 3000, 'replay_goalless_draw': True,
+}
+
+# --- Batched Simulation Engine ---
+# Simulations run in blocks. Every match of a round is drawn for the whole block at once from
+# fixed (home, away) team-index arrays, standings are folded in with one-hot incidence matrices and
+# groups are ranked with one stable argsort of a packed (points, gd, gs, ranking points) key, so a
+# group keeps its listed order on full ties.
+SIM_BLOCK_SIZE = 1000 # Simulations drawn together
+STANDING_FIELDS = ['points', 'gd', 'gs']
+POINTS, GD, GS = range(len(STANDING_FIELDS))
+_KEY_BITS = 15 # Bits per packed field
+_GD_OFFSET = 1 << (_KEY_BITS - 1)
+
+AFC_TEAMS = [team for group_data in third_round_groups.values() for team in group_data['teams']]
+AFC_TEAM_INDEX = {team: i for i, team in enumerate(AFC_TEAMS)}
+
+# Third round: (groups x teams) team indices, standings after MD9 and the MD10 fixtures as
+# flattened group * teams + slot indices
+THIRD_ROUND_TEAMS = np.array([[AFC_TEAM_INDEX[team] for team in group_data['teams']]
+                              for group_data in third_round_groups.values()], dtype=np.intp)
+THIRD_ROUND_STANDINGS = np.array([[[group_data['standings'][team][field] for field in STANDING_FIELDS]
+                                   for team in group_data['teams']]
+                                  for group_data in third_round_groups.values()], dtype=np.int64)
+THIRD_ROUND_HOME, THIRD_ROUND_AWAY = np.array([[g * THIRD_ROUND_TEAMS.shape[1] + group_data['teams'].index(team)
+                                                for team in fixture]
+                                               for g, group_data in enumerate(third_round_groups.values())
+                                               for fixture in group_data['fixtures_md10']], dtype=np.intp).T
+
+# Fourth round template: the six 3rd/4th-placed teams are drawn into slots 0-5; slots 0-2 form
+# Group A and 3-5 Group B, each a single round robin with the lower slot at home
+FOURTH_ROUND_GROUPS = 2
+FOURTH_ROUND_GROUP_SIZE = 3
+FOURTH_ROUND_HOME, FOURTH_ROUND_AWAY = np.array([(g * FOURTH_ROUND_GROUP_SIZE + home, g * FOURTH_ROUND_GROUP_SIZE + away)
+                                                 for g in range(FOURTH_ROUND_GROUPS)
+                                                 for home in range(FOURTH_ROUND_GROUP_SIZE)
+                                                 for away in range(home + 1, FOURTH_ROUND_GROUP_SIZE)], dtype=np.intp).T
+
+def match_ratings():
+    """Ranking points for every rated team and every third-round team, for the pairwise probability table."""
+    teams = list(team_strengths) + [team for team in AFC_TEAMS if team not in team_strengths]
+    return {team: get_team_rank_points(team) for team in teams}
+
+def afc_match_arrays():
+    """
+    Returns (ratings, cumulative) over AFC_TEAMS: ranking points and the (teams x teams x 3)
+    outcome thresholds, taken from the (rebuilt if stale) pairwise probability table.
+    """
+    table = probability_table(match_ratings(), AFC_MATCH_MODEL)
+    rows = np.array([table['index'][team] for team in AFC_TEAMS], dtype=np.intp)
+    ratings = np.array([get_team_rank_points(team) for team in AFC_TEAMS], dtype=float)
+    return ratings, table['cumulative'][np.ix_(rows, rows)]
+
+def play_matches(home, away, ratings, cumulative, rng=None, size=None):
+    """Draws scorelines for (broadcastable) arrays of home and away team indices. Returns (home goals, away goals)."""
+    return sample_scorelines(ratings[home], ratings[away], AFC_MATCH_MODEL, rng=rng, size=size,
+                             thresholds=cumulative[home, away])
+
+def slot_incidence(slots, num_slots):
+    """One-hot (fixtures x slots) matrix: entry [f, s] is 1 when slot s plays in fixture f."""
+    onehot = np.zeros((len(slots), num_slots), dtype=np.int64)
+    onehot[np.arange(len(slots)), slots] = 1
+    return onehot
+
+def fixture_standings(home_goals, away_goals, home_onehot, away_onehot):
+    """Folds (sims x fixtures) scorelines into (sims x slots x STANDING_FIELDS) points, gd and gs."""
+    draws = (home_goals == away_goals).astype(np.int64)
+    home_points = np.where(home_goals > away_goals, 3, draws)
+    away_points = np.where(away_goals > home_goals, 3, draws)
+    return np.stack([home_points @ home_onehot + away_points @ away_onehot,
+                     (home_goals - away_goals) @ (home_onehot - away_onehot),
+                     home_goals @ home_onehot + away_goals @ away_onehot], axis=-1)
+
+def rank_groups(standings, ordinals):
+    """
+    Ranks groups by points, then gd, then gs, then ranking points (ordinals: dense ranks of them).
+    standings is (... x teams x fields). Returns team slots by final position along the last axis.
+    """
+    key = ((standings[..., POINTS] << (3 * _KEY_BITS))
+           | ((standings[..., GD] + _GD_OFFSET) << (2 * _KEY_BITS))
+           | (standings[..., GS] << _KEY_BITS)
+           | ordinals)
+    return np.argsort(-key, axis=-1, kind='stable')
+
+def simulate_two_legged_ties(team1, team2, ratings, cumulative, rng=None):
+    """
+    Resolves a batch of two-legged ties at once; team1[i] hosts the first leg against team2[i].
+    Aggregate score decides, then away goals, then the higher ranking points (as a penalties stand-in).
+    Returns the winners' team indices.
+    """
+    goals1_leg1, goals2_leg1 = play_matches(team1, team2, ratings, cumulative, rng)
+    goals2_leg2, goals1_leg2 = play_matches(team2, team1, ratings, cumulative, rng) # Team 2 is "home"
+
+    aggregate = (goals1_leg1 + goals1_leg2) - (goals2_leg1 + goals2_leg2)
+    away_goals = goals1_leg2 - goals2_leg1 # Team 1's away goals (Leg 2) minus Team 2's (Leg 1)
+    penalties = np.where(ratings[team1] > ratings[team2], 1, -1)
+    decider = np.where(aggregate != 0, aggregate, np.where(away_goals != 0, away_goals, penalties))
+    return np.where(decider > 0, team1, team2)
 
 # --- Main Simulation Function ---
 
-def simulate_afc_qualifiers(num_simulations=1000):
-    direct_qualifiers_counts = defaultdict(int)
-    playoff_tournament_qual_counts = defaultdict(int)
-
-    for _ in tqdm(range(num_simulations), desc="Simulating AFC Qualifiers"):
-
-        # 1. Third Round (Simulate Matchday 10)
-        third_round_final_standings = {}
-        third_round_third_place = []
-        third_round_fourth_place = []
-
-        for group_name, group_data in third_round_groups.items():
-            final_group_standings = simulate_group_matches(group_data, group_data['standings'])
-            sorted_group = calculate_group_standings(final_group_standings)
-            third_round_final_standings[group_name] = sorted_group
-
-            # Top 2 qualify directly
-            for i in range(2):
-                team = sorted_group[i][0]
-                if team not in ALREADY_QUALIFIED_DIRECTLY: # Only add if not already confirmed
-                    direct_qualifiers_counts[team] += 1
-            # 3rd and 4th go to Fourth Round
-            third_round_third_place.append(sorted_group[2][0])
-            third_round_fourth_place.append(sorted_group[3][0])
-
-        # Combine 3rd and 4th placed teams for Fourth Round
-        fourth_round_teams = third_round_third_place + third_round_fourth_place
-        # Sort by rank for semi-random group assignment (higher ranked teams try to avoid each other)
-        fourth_round_teams.sort(key=get_team_rank_points, reverse=True)
-        random.shuffle(fourth_round_teams) # Add some randomness to group formation
-
-        # 2. Fourth Round (Two groups of three, single-leg round-robin)
-        # 8 direct slots for AFC. 6 are known. 2 more come from Fourth Round.
-        # 6 teams from 3rd/4th place (A3, A4, B3, B4, C3, C4)
-        # Groups of 3. Play once.
-        fourth_round_group_a_teams = fourth_round_teams[0:3]
-        fourth_round_group_b_teams = fourth_round_teams[3:6]
-
-        fourth_round_group_winners = []
-        fourth_round_group_runners_up = []
-
-        # Simulate Group A
-        group_a_standings = {team: {'points': 0, 'gd': 0, 'gs': 0} for team in fourth_round_group_a_teams}
-        group_a_fixtures = [
-            (fourth_round_group_a_teams[0], fourth_round_group_a_teams[1]),
-            (fourth_round_group_a_teams[0], fourth_round_group_a_teams[2]),
-            (fourth_round_group_a_teams[1], fourth_round_group_a_teams[2]),
-        ]
-        random.shuffle(group_a_fixtures)
-
-        for team1, team2 in group_a_fixtures:
-            home_goals, away_goals = predict_match_outcome(team1, team2, is_knockout=False) # Neutral venue implied, but function uses "home" for consistency
-
-            if home_goals > away_goals:
-                group_a_standings[team1]['points'] += 3
-            elif home_goals < away_goals:
-                group_a_standings[team2]['points'] += 3
-            else:
-                group_a_standings[team1]['points'] += 1
-                group_a_standings[team2]['points'] += 1
-
-            group_a_standings[team1]['gd'] += (home_goals - away_goals)
-            group_a_standings[team2]['gd'] += (away_goals - home_goals)
-            group_a_standings[team1]['gs'] += home_goals
-            group_a_standings[team2]['gs'] += away_goals
-
-        sorted_group_a = calculate_group_standings(group_a_standings)
-        fourth_round_group_winners.append(sorted_group_a[0][0])
-        fourth_round_group_runners_up.append(sorted_group_a[1][0])
-
-        # Simulate Group B (similar logic)
-        group_b_standings = {team: {'points': 0, 'gd': 0, 'gs': 0} for team in fourth_round_group_b_teams}
-        group_b_fixtures = [
-            (fourth_round_group_b_teams[0], fourth_round_group_b_teams[1]),
-            (fourth_round_group_b_teams[0], fourth_round_group_b_teams[2]),
-            (fourth_round_group_b_teams[1], fourth_round_group_b_teams[2]),
-        ]
-        random.shuffle(group_b_fixtures)
-
-        for team1, team2 in group_b_fixtures:
-            home_goals, away_goals = predict_match_outcome(team1, team2, is_knockout=False)
-
-            if home_goals > away_goals:
-                group_b_standings[team1]['points'] += 3
-            elif home_goals < away_goals:
-                group_b_standings[team2]['points'] += 3
-            else:
-                group_b_standings[team1]['points'] += 1
-                group_b_standings[team2]['points'] += 1
-
-            group_b_standings[team1]['gd'] += (home_goals - away_goals)
-            group_b_standings[team2]['gd'] += (away_goals - home_goals)
-            group_b_standings[team1]['gs'] += home_goals
-            group_b_standings[team2]['gs'] += away_goals
-
-        sorted_group_b = calculate_group_standings(group_b_standings)
-        fourth_round_group_winners.append(sorted_group_b[0][0])
-        fourth_round_group_runners_up.append(sorted_group_b[1][0])
-
-        # Add Fourth Round group winners to direct qualifiers
-        for team in fourth_round_group_winners:
-            direct_qualifiers_counts[team] += 1
-
-        # 3. Fifth Round (Playoff for Inter-confederation Playoff spot)
-        # The two runners-up from the Fourth Round (fourth_round_group_runners_up) play a two-legged tie.
-        fifth_round_contenders = fourth_round_group_runners_up
-        # Ensure only 2 teams for the tie
-        if len(fifth_round_contenders) == 2:
-            interconf_playoff_team = simulate_two_legged_tie(fifth_round_contenders[0], fifth_round_contenders[1])
-            playoff_tournament_qual_counts[interconf_playoff_team] += 1
+def count_afc_qualifiers(num_simulations=1000, rng=None, progress=True):
+    """
+    Simulates the rest of AFC qualifying in blocks. Returns {category: {team: count}} for 'direct'
+    (already qualified teams count every run) and 'interconfederation_playoff'.
+    """
+    rng = rng if rng is not None else outcome_sampler.RNG
+    ratings, cumulative = afc_match_arrays()
+    ordinals = np.unique(ratings, return_inverse=True)[1].reshape(-1) # Dense ranks of ranking points
+    already_qualified = np.isin(AFC_TEAMS, ALREADY_QUALIFIED_DIRECTLY)
+
+    third_round_home_onehot = slot_incidence(THIRD_ROUND_HOME, THIRD_ROUND_TEAMS.size)
+    third_round_away_onehot = slot_incidence(THIRD_ROUND_AWAY, THIRD_ROUND_TEAMS.size)
+    fourth_round_home_onehot = slot_incidence(FOURTH_ROUND_HOME, FOURTH_ROUND_GROUPS * FOURTH_ROUND_GROUP_SIZE)
+    fourth_round_away_onehot = slot_incidence(FOURTH_ROUND_AWAY, FOURTH_ROUND_GROUPS * FOURTH_ROUND_GROUP_SIZE)
+
+    direct_counts = np.zeros(len(AFC_TEAMS), dtype=np.int64)
+    playoff_counts = np.zeros(len(AFC_TEAMS), dtype=np.int64)
+
+    with tqdm(total=num_simulations, desc="Simulating AFC Qualifiers", disable=not progress) as progress_bar:
+        for block_start in range(0, num_simulations, SIM_BLOCK_SIZE):
+            block_size = min(SIM_BLOCK_SIZE, num_simulations - block_start)
+
+            # 1. Third Round (Simulate Matchday 10)
+            flat_teams = THIRD_ROUND_TEAMS.reshape(-1)
+            home_goals, away_goals = play_matches(flat_teams[THIRD_ROUND_HOME], flat_teams[THIRD_ROUND_AWAY], ratings, cumulative,
+                                                  rng, size=(block_size, len(THIRD_ROUND_HOME)))
+            standings = THIRD_ROUND_STANDINGS[None] + fixture_standings(
+                home_goals, away_goals, third_round_home_onehot, third_round_away_onehot).reshape((block_size,) + THIRD_ROUND_STANDINGS.shape)
+            order = rank_groups(standings, ordinals[THIRD_ROUND_TEAMS])
+            placed = np.take_along_axis(np.broadcast_to(THIRD_ROUND_TEAMS, order.shape), order, axis=-1)
+
+            # Top 2 qualify directly (only counted if not already confirmed)
+            top_two = placed[:, :, :2].reshape(-1)
+            direct_counts += np.bincount(top_two[~already_qualified[top_two]], minlength=len(AFC_TEAMS))
+
+            # 2. Fourth Round (Two groups of three, single-leg round-robin)
+            # 3rd and 4th placed teams (A3, B3, C3, A4, B4, C4) are drawn at random into the six slots
+            fourth_round_teams = np.concatenate([placed[:, :, 2], placed[:, :, 3]], axis=1)
+            draw = np.argsort(rng.random(fourth_round_teams.shape), axis=1)
+            fourth_round_teams = np.take_along_axis(fourth_round_teams, draw, axis=1)
+
+            home_goals, away_goals = play_matches(fourth_round_teams[:, FOURTH_ROUND_HOME], fourth_round_teams[:, FOURTH_ROUND_AWAY],
+                                                  ratings, cumulative, rng)
+            group_shape = (block_size, FOURTH_ROUND_GROUPS, FOURTH_ROUND_GROUP_SIZE)
+            standings = fixture_standings(home_goals, away_goals, fourth_round_home_onehot,
+                                          fourth_round_away_onehot).reshape(group_shape + (len(STANDING_FIELDS),))
+            group_teams = fourth_round_teams.reshape(group_shape)
+            placed = np.take_along_axis(group_teams, rank_groups(standings, ordinals[group_teams]), axis=-1)
+
+            # Fourth Round group winners qualify directly
+            direct_counts += np.bincount(placed[:, :, 0].reshape(-1), minlength=len(AFC_TEAMS))
+
+            # 3. Fifth Round (Playoff for Inter-confederation Playoff spot)
+            # The two runners-up from the Fourth Round play a two-legged tie.
+            interconf_playoff_teams = simulate_two_legged_ties(placed[:, 0, 1], placed[:, 1, 1], ratings, cumulative, rng)
+            playoff_counts += np.bincount(interconf_playoff_teams, minlength=len(AFC_TEAMS))
+
+            progress_bar.update(block_size)
+
+    direct_qualifiers_counts = {AFC_TEAMS[t]: int(count) for t, count in enumerate(direct_counts) if count}
+    # Add already qualified teams with 100% chance for reporting
+    for team in ALREADY_QUALIFIED_DIRECTLY:
+        direct_qualifiers_counts[team] = num_simulations # Mark as 100% qualified
+
+    return {
+        'direct': direct_qualifiers_counts,
+        'interconfederation_playoff': {AFC_TEAMS[t]: int(count) for t, count in enumerate(playoff_counts) if count},
+    }
+
+def print_afc_results(counts, num_simulations):
+    direct_qualifiers_counts = counts['direct']
+    playoff_tournament_qual_counts = counts['interconfederation_playoff']
 
     print(f"\n--- AFC World Cup 2026 Qualification Simulation Results ({num_simulations} runs) ---")
     print(f"**Note:** This simulation covers the remaining Third Round matches, Fourth Round, and Fifth Round.")
     print(f"AFC has 8 direct World Cup slots and 1 Inter-confederation Play-off slot.")
 
     print("\n--- Direct World Cup Qualifiers ---")
-    # Add already qualified teams with 100% chance for reporting
-    for team in ALREADY_QUALIFIED_DIRECTLY:
-        direct_qualifiers_counts[team] = num_simulations # Mark as 100% qualified
-
     sorted_direct_qualifiers = sorted(direct_qualifiers_counts.items(), key=lambda item: (-item[1], item[0]))
     for team, count in sorted_direct_qualifiers:
         print(f"{team}: {count / num_simulations:.2%}")
@@ -326,6 +285,13 @@ def simulate_afc_qualifiers(num_simulations=1000):
     for team, count in sorted_playoff_qualifiers:
         print(f"{team}: {count / num_simulations:.2%}")
 
+def simulate_afc_qualifiers(num_simulations=1000, rng=None):
+    print_afc_results(count_afc_qualifiers(num_simulations, rng), num_simulations)
+
+def count_qualification(num_simulations=1000, progress=True):
+    """Runner hook (see run_qualifiers.py): counts drawn from the shared outcome_sampler generator."""
+    return count_afc_qualifiers(num_simulations, progress=progress)
+
 # --- Main Execution ---
 if __name__ == "__main__":
     simulate_afc_qualifiers(num_simulations=1000)
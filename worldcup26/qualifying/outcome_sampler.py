@@ -0,0 +1,204 @@
+import random
+from bisect import bisect
+import numpy as np
+
+# --- Shared Qualifying Match Model ---
+# Every confederation script draws a match the same way: pick home win / draw / away win from
+# strength-based probabilities, then build a scoreline for that outcome. The scripts differ only
+# in their constants, so each one describes its model as a dict (see the *_MATCH_MODEL constants
+# in the scripts) and this module samples it, for whole arrays of matches at once
+# (sample_scorelines, NumPy) or for one match at a time (sample_scoreline, pure Python on the
+# random module, drawing in the same order as the scripts' original code).
+#
+# Model keys:
+#   'probabilities'         'elo' (home_advantage, draw_prob) or 'linear' (base_probs, win_slope, draw_slope)
+#   'win_goals'             winner scores randint(1, win_goals) plus a margin bonus of round(diff / margin_scale)
+#   'margin_scale'
+#   'negative_margin'       False clips the bonus at 0; True lets an underdog winner's bonus go negative
+#   'draw_goals'            each side of a draw scores randint(0, draw_goals) + round((home + away) / draw_scale)
+#   'draw_scale'
+#   'replay_goalless_draw'  True turns a goalless draw into 1-1 or 2-2 (equally likely)
+
+HOME_WIN, DRAW, AWAY_WIN = range(3)
+
+RNG = np.random.default_rng() # Used by sample_scorelines when the caller does not pass a generator
+
+def seed_rng(seed):
+    """Reseeds the shared NumPy generator (random.seed counterpart for the vectorized sampler)."""
+    global RNG
+    RNG = np.random.default_rng(seed)
+
+def elo_probabilities(home_rating, away_rating, home_advantage, draw_prob):
+    """
+    Elo win probability with a fixed draw share. A negative away share is moved into the draw,
+    then the three probabilities are normalized. Returns (home win, draw, away win) arrays.
+    """
+    home_win = 1 / (1 + 10 ** ((away_rating - home_rating + home_advantage) / 400))
+    away_win = 1 - home_win - draw_prob
+    draw = draw_prob + np.minimum(away_win, 0)
+    away_win = np.maximum(away_win, 0)
+    total = home_win + draw + away_win
+    return home_win / total, draw / total, away_win / total
+
+def linear_probabilities(home_rating, away_rating, base_probs, win_slope, draw_slope):
+    """
+    Base probabilities shifted linearly by the rating difference, each clipped to [0.05, 0.95],
+    then normalized. Returns (home win, draw, away win) arrays.
+    """
+    strength_diff = home_rating - away_rating
+    base_home_win, base_draw, base_away_win = base_probs
+    home_win = np.clip(base_home_win + strength_diff * win_slope, 0.05, 0.95)
+    away_win = np.clip(base_away_win - strength_diff * win_slope, 0.05, 0.95)
+    draw = np.clip(base_draw - np.abs(strength_diff) * draw_slope, 0.05, 0.95)
+    total = home_win + draw + away_win
+    return home_win / total, draw / total, away_win / total
+
+def outcome_probabilities(home_rating, away_rating, model):
+    """Returns the model's (home win, draw, away win) probability arrays for the given ratings."""
+    home_rating = np.asarray(home_rating, dtype=float)
+    away_rating = np.asarray(away_rating, dtype=float)
+    if model['probabilities'] == 'elo':
+        return elo_probabilities(home_rating, away_rating, model['home_advantage'], model['draw_prob'])
+    return linear_probabilities(home_rating, away_rating, model['base_probs'], model['win_slope'], model['draw_slope'])
+
+def outcome_thresholds(home_rating, away_rating, model):
+    """Cumulative (home win, + draw, + away win) thresholds, stacked on a trailing axis of length 3."""
+    home_win, draw, away_win = outcome_probabilities(home_rating, away_rating, model)
+    return np.stack([home_win, home_win + draw, home_win + draw + away_win], axis=-1)
+
+def sample_outcomes(thresholds, u):
+    """Inverse-CDF draw of HOME_WIN / DRAW / AWAY_WIN from cumulative thresholds and uniforms u."""
+    x = u * thresholds[..., 2]
+    return (x >= thresholds[..., 0]).astype(np.int64) + (x >= thresholds[..., 1])
+
+def sample_goals(outcome, home_rating, away_rating, model, rng):
+    """
+    Builds a scoreline for each drawn outcome, with the model's conditional goal distributions.
+    Returns (home goals, away goals) int arrays.
+    """
+    strength_diff = np.asarray(home_rating, dtype=float) - np.asarray(away_rating, dtype=float)
+    shape = outcome.shape
+
+    # Winner: randint(1, win_goals) plus the rounded margin bonus (round half to even, as Python's round)
+    margin = np.round(np.where(outcome == AWAY_WIN, -strength_diff, strength_diff) / model['margin_scale']).astype(np.int64)
+    if not model['negative_margin']:
+        margin = np.maximum(margin, 0)
+    winner_goals = rng.integers(1, model['win_goals'] + 1, size=shape) + margin
+    # Loser: randint(0, winner_goals - 1), never below 0
+    loser_goals = rng.integers(0, np.maximum(winner_goals - 1, 0) + 1, size=shape)
+    winner_goals = np.maximum(winner_goals, 1)
+
+    # Draw: both sides score the same
+    rating_sum = np.asarray(home_rating, dtype=float) + np.asarray(away_rating, dtype=float)
+    draw_goals = np.maximum(rng.integers(0, model['draw_goals'] + 1, size=shape)
+                            + np.round(rating_sum / model['draw_scale']).astype(np.int64), 0)
+    if model['replay_goalless_draw']:
+        draw_goals = np.where(draw_goals == 0, rng.integers(1, 3, size=shape), draw_goals)
+
+    home_goals = np.select([outcome == HOME_WIN, outcome == AWAY_WIN], [winner_goals, loser_goals], draw_goals)
+    away_goals = np.select([outcome == HOME_WIN, outcome == AWAY_WIN], [loser_goals, winner_goals], draw_goals)
+    return home_goals, away_goals
+
+def sample_scorelines(home_rating, away_rating, model, rng=None, size=None, thresholds=None):
+    """
+    Samples scorelines for arrays of (broadcastable) home and away ratings under a confederation model.
+    size, if given, is broadcast in too (e.g. one match drawn for a whole block of simulations).
+    thresholds, if given, are precomputed outcome thresholds (see probability_table) for the pairings.
+    Returns (home goals, away goals) int arrays of the broadcast shape.
+    """
+    rng = rng if rng is not None else RNG
+    shape = np.broadcast_shapes(np.shape(home_rating), np.shape(away_rating), () if size is None else tuple(np.atleast_1d(size)))
+    home_rating = np.broadcast_to(np.asarray(home_rating, dtype=float), shape)
+    away_rating = np.broadcast_to(np.asarray(away_rating, dtype=float), shape)
+    if thresholds is None:
+        thresholds = outcome_thresholds(home_rating, away_rating, model)
+    outcome = sample_outcomes(np.asarray(thresholds), rng.random(shape))
+    return sample_goals(outcome, home_rating, away_rating, model, rng)
+
+# --- Single-Match Sampling ---
+def match_probabilities(home_rating, away_rating, model):
+    """Scalar (home win, draw, away win) probabilities, computed exactly as the scripts always have."""
+    if model['probabilities'] == 'elo':
+        home_win = 1 / (1 + 10**((away_rating - home_rating + model['home_advantage']) / 400))
+        draw = model['draw_prob']
+        away_win = 1 - home_win - draw
+        if away_win < 0:
+            draw += away_win
+            away_win = 0
+    else:
+        strength_diff = home_rating - away_rating
+        base_home_win, base_draw, base_away_win = model['base_probs']
+        home_win = max(0.05, min(0.95, base_home_win + (strength_diff * model['win_slope'])))
+        away_win = max(0.05, min(0.95, base_away_win - (strength_diff * model['win_slope'])))
+        draw = max(0.05, min(0.95, base_draw - abs(strength_diff) * model['draw_slope']))
+    total = home_win + draw + away_win
+    return home_win / total, draw / total, away_win / total
+
+def match_thresholds(home_rating, away_rating, model):
+    """Scalar cumulative thresholds, accumulated as random.choices accumulates its weights."""
+    home_win, draw, away_win = match_probabilities(home_rating, away_rating, model)
+    return (home_win, home_win + draw, home_win + draw + away_win)
+
+def sample_scoreline(home_rating, away_rating, model, rng=random, thresholds=None):
+    """
+    Samples one match's scoreline with the random module (or any object with random() and randint()).
+    thresholds, if given, are the pairing's precomputed outcome thresholds (see table_thresholds).
+    Returns (home goals, away goals) as ints, with the same distribution as sample_scorelines.
+    """
+    cum_weights = thresholds if thresholds is not None else match_thresholds(home_rating, away_rating, model)
+    outcome = bisect(cum_weights, rng.random() * cum_weights[-1], 0, 2) # As random.choices draws it
+
+    if outcome == DRAW:
+        goals = max(0, rng.randint(0, model['draw_goals']) + round((home_rating + away_rating) / model['draw_scale']))
+        if goals == 0 and model['replay_goalless_draw']:
+            goals = rng.randint(1, 2)
+        return goals, goals
+
+    strength_diff = home_rating - away_rating if outcome == HOME_WIN else away_rating - home_rating
+    margin = round(strength_diff / model['margin_scale'])
+    if not model['negative_margin']:
+        margin = max(0, margin)
+    winner_goals = rng.randint(1, model['win_goals']) + margin
+    loser_goals = rng.randint(0, max(0, winner_goals - 1))
+    winner_goals = max(1, winner_goals)
+    return (winner_goals, loser_goals) if outcome == HOME_WIN else (loser_goals, winner_goals)
+
+# --- Pairwise Probability Tables ---
+# Ratings are fixed for a run, so a model's outcome thresholds for every ordered pair of teams are
+# built once and sampling becomes a table lookup plus one uniform draw. A table remembers the
+# ratings it was built from: probability_table() compares them with the current ratings and
+# rebuilds on any difference, so editing team_strengths invalidates it automatically. Simulation
+# entry points call probability_table() once per run; per-match code reads pairings through
+# table_thresholds(), which checks just the two teams' ratings against the table's snapshot and
+# rebuilds through probability_table() on a mismatch.
+_TABLES = {} # id(model) -> table built by build_probability_table
+
+def build_probability_table(ratings, model):
+    """
+    Builds a model's table for a {team: rating} dict: 'pairs' maps (home, away) to scalar thresholds
+    and 'cumulative' holds the same values as a (teams x teams x 3) array indexed through 'index'.
+    """
+    index = {team: i for i, team in enumerate(ratings)}
+    pairs = {(home, away): match_thresholds(ratings[home], ratings[away], model)
+             for home in ratings for away in ratings if home != away}
+    cumulative = np.zeros((len(index), len(index), 3))
+    for (home, away), thresholds in pairs.items():
+        cumulative[index[home], index[away]] = thresholds
+    return {'ratings': dict(ratings), 'index': index, 'pairs': pairs, 'cumulative': cumulative}
+
+def probability_table(ratings, model):
+    """Returns the model's table for these ratings, rebuilding it if the ratings changed since it was built."""
+    table = _TABLES.get(id(model))
+    if table is None or table['ratings'] != ratings:
+        table = _TABLES[id(model)] = build_probability_table(ratings, model)
+    return table
+
+def table_thresholds(ratings, model, home_team, away_team):
+    """
+    Thresholds for one pairing from the model's table, or None if there is no entry. The table is
+    rebuilt first if either team's rating differs from the one it was built with.
+    """
+    table = _TABLES.get(id(model))
+    if table is None or any(table['ratings'].get(team) != ratings.get(team) for team in (home_team, away_team)):
+        table = probability_table(ratings, model)
+    return table['pairs'].get((home_team, away_team))
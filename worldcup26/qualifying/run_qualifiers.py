@@ -0,0 +1,130 @@
+import argparse
+import csv
+import importlib
+import json
+import random
+import sys
+from multiprocessing import Pool, cpu_count
+import numpy as np
+from tqdm import tqdm
+import outcome_sampler
+
+# --- Unified Qualifying Runner ---
+# Runs any subset of the confederation simulators in one process pool, e.g.
+#   python worldcup26/qualifying/run_qualifiers.py caf uefa --simulations 20000 --seed 7 --json results.json
+# Each confederation's runs are split into shards of at most SHARD_SIZE simulations. Every shard
+# gets its own child of the confederation's SeedSequence and seeds both the random module and the
+# shared NumPy generator (outcome_sampler.RNG) from it, so for a given --seed the results do not
+# depend on --workers or on which other confederations run alongside. Each script exposes a
+# count_qualification(num_simulations, progress) hook returning {category: {team: count}}; shard
+# counts are summed per confederation and written as probabilities.
+
+# Confederation -> (script module, default number of simulations)
+CONFEDERATIONS = {
+    'caf': ('Africa', 10000),
+    'afc': ('asia', 1000),
+    'uefa': ('uefa', 5000),
+    'conmebol': ('Southamerica', 10000),
+}
+SHARD_SIZE = 1000 # Simulations per pool task
+
+def shard_tasks(confederations, num_simulations=None, seed=None):
+    """
+    Splits every selected confederation into (confederation, shard size, SeedSequence) tasks.
+    Seed streams are spawned per confederation in CONFEDERATIONS order, then per shard.
+    """
+    tasks = []
+    for confederation, seed_seq in zip(CONFEDERATIONS, np.random.SeedSequence(seed).spawn(len(CONFEDERATIONS))):
+        if confederation not in confederations:
+            continue
+        total_runs = num_simulations if num_simulations is not None else CONFEDERATIONS[confederation][1]
+        shard_sizes = [min(SHARD_SIZE, total_runs - start) for start in range(0, total_runs, SHARD_SIZE)]
+        tasks.extend(zip([confederation] * len(shard_sizes), shard_sizes, seed_seq.spawn(len(shard_sizes))))
+    return tasks
+
+def simulate_shard(task):
+    """Pool worker: runs one shard of a confederation from the shard's own seed streams and returns its counts."""
+    confederation, num_simulations, seed_seq = task
+    random_seed, numpy_seed = seed_seq.spawn(2)
+    random.seed(int(random_seed.generate_state(1)[0]))
+    outcome_sampler.seed_rng(numpy_seed)
+    module = importlib.import_module(CONFEDERATIONS[confederation][0])
+    return confederation, num_simulations, module.count_qualification(num_simulations, progress=False)
+
+def merge_counts(results, confederation, num_simulations, counts):
+    """Adds one shard's counts into results[confederation]."""
+    merged = results.setdefault(confederation, {'simulations': 0, 'counts': {}})
+    merged['simulations'] += num_simulations
+    for category, team_counts in counts.items():
+        category_counts = merged['counts'].setdefault(category, {})
+        for team, count in team_counts.items():
+            category_counts[team] = category_counts.get(team, 0) + count
+
+def run_confederations(confederations, num_simulations=None, seed=None, workers=1):
+    """Runs the selected confederations' shards, in a Pool when workers > 1, and returns the merged counts."""
+    tasks = shard_tasks(confederations, num_simulations, seed)
+    results = {}
+    with tqdm(total=sum(task[1] for task in tasks), desc="Simulating Qualifiers") as progress:
+        if workers > 1:
+            with Pool(processes=workers) as pool:
+                for confederation, runs, counts in pool.imap(simulate_shard, tasks):
+                    merge_counts(results, confederation, runs, counts)
+                    progress.update(runs)
+        else:
+            for confederation, runs, counts in map(simulate_shard, tasks):
+                merge_counts(results, confederation, runs, counts)
+                progress.update(runs)
+    return results
+
+def probability_rows(results):
+    """Flattens merged counts to (confederation, category, team, probability) rows, most likely first."""
+    rows = []
+    for confederation, merged in results.items():
+        for category, team_counts in merged['counts'].items():
+            for team, count in sorted(team_counts.items(), key=lambda item: (-item[1], item[0])):
+                rows.append((confederation, category, team, count / merged['simulations']))
+    return rows
+
+def results_json(results, seed):
+    """Merged results as a JSON-ready dict: per confederation, its run count and {category: {team: probability}}."""
+    confederations = {confederation: {'simulations': merged['simulations'], 'probabilities': {}}
+                      for confederation, merged in results.items()}
+    for confederation, category, team, probability in probability_rows(results):
+        confederations[confederation]['probabilities'].setdefault(category, {})[team] = probability
+    return {'seed': seed, 'confederations': confederations}
+
+def write_csv(path, results):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['confederation', 'category', 'team', 'probability'])
+        writer.writerows(probability_rows(results))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="World Cup 2026 qualifying simulations for several confederations")
+    parser.add_argument('confederations', nargs='*', metavar='CONFEDERATION',
+                        help=f"Confederations to simulate, from {', '.join(CONFEDERATIONS)} (default: all)")
+    parser.add_argument('--simulations', type=int, default=None, help="Simulations per confederation (default: each script's own)")
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducibility')
+    parser.add_argument('--workers', type=int, default=cpu_count(), help='Worker processes (1 runs serially)')
+    parser.add_argument('--json', dest='json_path', default=None, help='Write merged probabilities to this JSON file')
+    parser.add_argument('--csv', dest='csv_path', default=None, help='Write merged probabilities to this CSV file')
+    args = parser.parse_args()
+    unknown = [confederation for confederation in args.confederations if confederation not in CONFEDERATIONS]
+    if unknown:
+        parser.error(f"unknown confederation(s): {', '.join(unknown)}")
+    args.confederations = args.confederations or list(CONFEDERATIONS)
+    return args
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    args = parse_args()
+    results = run_confederations(args.confederations, args.simulations, args.seed, args.workers)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results_json(results, args.seed), f, indent=2)
+    if args.csv_path:
+        write_csv(args.csv_path, results)
+    if not (args.json_path or args.csv_path):
+        json.dump(results_json(results, args.seed), sys.stdout, indent=2)
+        print()
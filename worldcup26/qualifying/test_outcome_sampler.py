@@ -0,0 +1,28 @@
+import random
+from outcome_sampler import match_thresholds, probability_table, sample_scoreline, table_thresholds
+
+MODEL = {
+    'probabilities': 'linear', 'base_probs': (0.45, 0.25, 0.30), 'win_slope': 0.0005, 'draw_slope': 0.00025,
+    'win_goals': 3, 'margin_scale': 400, 'negative_margin': False,
+    'draw_goals': 2, 'draw_scale': 3000, 'replay_goalless_draw': False,
+}
+
+def test_table_thresholds_follow_rating_changes():
+    ratings = {'Argentina': 1880, 'Bolivia': 1300, 'Chile': 1450}
+    probability_table(ratings, MODEL)
+    assert table_thresholds(ratings, MODEL, 'Argentina', 'Bolivia') == match_thresholds(1880, 1300, MODEL)
+
+    ratings['Argentina'] = 1200
+    thresholds = table_thresholds(ratings, MODEL, 'Argentina', 'Bolivia')
+    assert thresholds == match_thresholds(1200, 1300, MODEL)
+
+    # Sampling from the table matches sampling from the ratings directly
+    table_rng, direct_rng = random.Random(5), random.Random(5)
+    for _ in range(200):
+        assert (sample_scoreline(1200, 1300, MODEL, rng=table_rng, thresholds=table_thresholds(ratings, MODEL, 'Argentina', 'Bolivia'))
+                == sample_scoreline(1200, 1300, MODEL, rng=direct_rng))
+
+def test_table_thresholds_without_entry():
+    ratings = {'Argentina': 1880, 'Bolivia': 1300}
+    probability_table(ratings, MODEL)
+    assert table_thresholds(ratings, MODEL, 'Argentina', 'Peru') is None
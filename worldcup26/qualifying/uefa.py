@@ -1,7 +1,11 @@
 import random
-from collections import defaultdict
+import argparse
+import json
 from tqdm import tqdm
 import math
+from itertools import permutations
+import numpy as np
+from outcome_sampler import sample_scoreline, sample_scorelines, probability_table, table_thresholds
 
 team_strengths = {
     'Argentina': 1886.16, 'Spain': 1854.64, 'France': 1852.71, 'England': 1819.20,
@@ -296,107 +300,74 @@ remaining_fixtures = [
     ('Czechia', 'Faroe Islands', 'Group L'),
 ]
 
-def predict_match_outcome(home_team, away_team, match_type='group_stage'):
-    home_rank_points = team_strengths.get(home_team, 1000)
-    away_rank_points = team_strengths.get(away_team, 1000)
-
-    strength_diff = home_rank_points - away_rank_points
-
-    base_home_win_prob = 0.45
-    base_draw_prob = 0.25
-    base_away_win_prob = 0.30
-
-    if match_type == 'knockout':
-        base_draw_prob *= 0.8
-        diff_for_wins = (0.25 - base_draw_prob) / 2
-        base_home_win_prob += diff_for_wins
-        base_away_win_prob += diff_for_wins
-
-    # Explicitly initialize to avoid UnboundLocalError in very rare cases
-    home_win_prob = 0.0
-    away_win_prob = 0.0
-    draw_prob = 0.0
-
-    home_win_prob = base_home_win_prob + (strength_diff * 0.0005)
-    away_win_prob = base_away_win_prob - (strength_diff * 0.0005)
-    draw_prob = base_draw_prob - abs(strength_diff) * 0.00025
-
-    home_win_prob = max(0.05, min(0.95, home_win_prob))
-    away_win_prob = max(0.05, min(0.95, away_win_prob))
-    draw_prob = max(0.05, min(0.95, draw_prob))
-
-    total_prob = home_win_prob + draw_prob + away_win_prob
-    if total_prob == 0:
-        home_win_prob = draw_prob = away_win_prob = 1/3
-    else:
-        home_win_prob /= total_prob
-        draw_prob /= total_prob
-        away_win_prob /= total_prob
-
-    outcome = random.choices(['home_win', 'draw', 'away_win'],
-                             weights=[home_win_prob, draw_prob, away_win_prob], k=1)[0]
-
-    if outcome == 'home_win':
-        home_goals = random.randint(1, 4) + round((home_rank_points - away_rank_points) / 500)
-        away_goals = random.randint(0, max(0, home_goals - 1))
-        home_goals = max(1, home_goals)
-        away_goals = max(0, away_goals)
-        if home_goals <= away_goals:
-            home_goals = away_goals + 1
-    elif outcome == 'away_win':
-        away_goals = random.randint(1, 4) + round((away_rank_points - home_rank_points) / 500)
-        home_goals = random.randint(0, max(0, away_goals - 1))
-        away_goals = max(1, away_goals)
-        home_goals = max(0, home_goals)
-        if away_goals <= home_goals:
-            away_goals = home_goals + 1
-    else:
-        goals = random.randint(0, 3) + round((home_rank_points + away_rank_points) / 2000)
-        home_goals = max(0, goals)
-        away_goals = max(0, goals)
-        if home_goals != away_goals:
-            home_goals = away_goals = max(home_goals, away_goals)
-
-    if match_type == 'knockout' and home_goals == away_goals:
-        if random.random() < 0.5:
-            home_goals += 1
-        else:
-            away_goals += 1
-
-    return home_goals, away_goals
-
-def calculate_group_standings(group_data):
-    sorted_teams = sorted(group_data.items(),
-                          key=lambda item: (item[1]['points'], item[1]['gd'], item[1]['gs'], team_strengths.get(item[0], 0)),
-                          reverse=True)
-    return sorted_teams
+# UEFA match model for the shared sampler (outcome_sampler.py): base 45/25/30 probabilities shifted
+# linearly by the strength difference; the winner's bonus per 500 points can go negative.
+UEFA_MATCH_MODEL = {
+    'probabilities': 'linear', 'base_probs': (0.45, 0.25, 0.30), 'win_slope': 0.0005, 'draw_slope': 0.00025,
+    'win_goals': 4, 'margin_scale': 500, 'negative_margin': True,
+    'draw_goals': 3, 'draw_scale': 2000, 'replay_goalless_draw': False,
+}
 
-def determine_nations_league_playoff_teams(simulated_group_results, num_needed=4):
-    nations_league_playoff_candidates = []
-    
-    wcq_top_two = set()
-    for group_name, teams_data in simulated_group_results.items():
-        sorted_teams = calculate_group_standings(teams_data)
-        if len(sorted_teams) >= 2:
-            wcq_top_two.add(sorted_teams[0][0])
-            wcq_top_two.add(sorted_teams[1][0])
-
-    for team in UNL_INTERIM_RANKING:
-        is_in_wcq = False
-        for group_data in simulated_group_results.values():
-            if team in group_data:
-                is_in_wcq = True
-                break
-        
-        if not is_in_wcq:
-            continue
-
-        if team not in wcq_top_two:
-            nations_league_playoff_candidates.append(team)
-            if len(nations_league_playoff_candidates) >= num_needed:
-                break
-
-    return nations_league_playoff_candidates[:num_needed]
+def knockout_match_model(model):
+    """Knockout variant: the draw share shrinks by 20% and the difference is split between the wins."""
+    base_home_win_prob, base_draw_prob, base_away_win_prob = model['base_probs']
+    base_draw_prob *= 0.8
+    diff_for_wins = (0.25 - base_draw_prob) / 2
+    return dict(model, base_probs=(base_home_win_prob + diff_for_wins, base_draw_prob, base_away_win_prob + diff_for_wins))
+
+UEFA_KNOCKOUT_MATCH_MODEL = knockout_match_model(UEFA_MATCH_MODEL)
+
+def knockout_winner(home_team, away_team):
+    """Plays one knockout match with UEFA_KNOCKOUT_MATCH_MODEL; a draw is settled by a coin flip."""
+    home_goals, away_goals = sample_scoreline(team_strengths.get(home_team, 1000), team_strengths.get(away_team, 1000),
+                                              UEFA_KNOCKOUT_MATCH_MODEL,
+                                              thresholds=table_thresholds(team_strengths, UEFA_KNOCKOUT_MATCH_MODEL, home_team, away_team))
+    if home_goals == away_goals:
+        return home_team if random.random() < 0.5 else away_team
+    return home_team if home_goals > away_goals else away_team
+
+def build_probability_tables():
+    """Builds (or revalidates against team_strengths) the pairwise tables for both UEFA match models."""
+    probability_table(team_strengths, UEFA_MATCH_MODEL)
+    probability_table(team_strengths, UEFA_KNOCKOUT_MATCH_MODEL)
+
+# --- Playoff Draw ---
+# Semi-finals pair Pot 1 with Pot 4 and Pot 2 with Pot 3, and each path joins one semi of each kind.
+# Only semi-final pairings are restricted (PROHIBITED_CLASHES), so a draw that is uniform over all
+# valid configurations is: a uniformly chosen valid Pot 1/Pot 4 pairing, an independent uniformly
+# chosen valid Pot 2/Pot 3 pairing, and a random matching of the two kinds of semi into paths.
+# The valid pairings of two pots (at most 4! = 24 orders) are enumerated on every draw, so a draw
+# takes bounded time, always yields all four paths and keeps no state between simulations.
+NUM_PLAYOFF_PATHS = 4
+
+def is_allowed_pairing(team1, team2):
+    return frozenset({team1, team2}) not in PROHIBITED_CLASHES
+
+def valid_pairings(pot, other_pot):
+    """Returns every ordering of other_pot whose i-th team may meet pot[i]."""
+    return [order for order in permutations(other_pot, len(pot))
+            if all(is_allowed_pairing(team, opponent) for team, opponent in zip(pot, order))]
+
+def draw_playoff_paths(pots, rng=random):
+    """
+    Draws the playoff paths uniformly among all valid draws. Returns a list of paths, each
+    [(Pot 1 team, Pot 4 team), (Pot 2 team, Pot 3 team)]; empty if a pot has fewer than
+    NUM_PLAYOFF_PATHS teams. Raises ValueError if the prohibited clashes leave no valid draw.
+    """
+    pot1, pot2, pot3, pot4 = (pots[name] for name in ('Pot1', 'Pot2', 'Pot3', 'Pot4'))
+    if min(len(pot1), len(pot2), len(pot3), len(pot4)) < NUM_PLAYOFF_PATHS:
+        return []
+    pot1, pot2 = pot1[:NUM_PLAYOFF_PATHS], pot2[:NUM_PLAYOFF_PATHS]
+
+    pot4_pairings = valid_pairings(pot1, pot4)
+    pot3_pairings = valid_pairings(pot2, pot3)
+    if not pot4_pairings or not pot3_pairings:
+        raise ValueError(f"No playoff draw avoids the prohibited clashes for pots {pots}")
+
+    first_semis = list(zip(pot1, rng.choice(pot4_pairings)))
+    second_semis = list(zip(pot2, rng.choice(pot3_pairings)))
+    rng.shuffle(second_semis) # Which Pot 2/Pot 3 semi joins which Pot 1/Pot 4 semi
+    return [[first_semi, second_semi] for first_semi, second_semi in zip(first_semis, second_semis)]
 
 def simulate_playoffs(runners_up, nations_league_teams):
     playoff_participants = list(runners_up)
@@ -427,91 +398,20 @@ def simulate_playoffs(runners_up, nations_league_teams):
         'Pot4': nl_teams_for_potting
     }
 
-    for pot in pots.values():
-        random.shuffle(pot)
-
-    playoff_paths = []
-    
-    used_teams = set()
-    draw_attempts = 0
-    max_draw_attempts = 1000
-
-    while len(playoff_paths) < 4 and draw_attempts < max_draw_attempts:
-        draw_attempts += 1
-        
-        available_pot1 = [t for t in pots['Pot1'] if t not in used_teams]
-        available_pot2 = [t for t in pots['Pot2'] if t not in used_teams]
-        available_pot3 = [t for t in pots['Pot3'] if t not in used_teams]
-        available_pot4 = [t for t in pots['Pot4'] if t not in used_teams]
-
-        if not (len(available_pot1) >= (4 - len(playoff_paths)) and \
-                len(available_pot2) >= (4 - len(playoff_paths)) and \
-                len(available_pot3) >= (4 - len(playoff_paths)) and \
-                len(available_pot4) >= (4 - len(playoff_paths))):
-            break
-            
-        try:
-            p1_team = random.choice(available_pot1)
-            p2_team = random.choice(available_pot2)
-            p3_team = random.choice(available_pot3)
-            p4_team = random.choice(available_pot4)
-            
-            sf1_pairing = frozenset({p1_team, p4_team})
-            sf2_pairing = frozenset({p2_team, p3_team})
-
-            clash_found = False
-            for clash_set in PROHIBITED_CLASHES:
-                if clash_set.issubset(sf1_pairing) or clash_set.issubset(sf2_pairing):
-                    clash_found = True
-                    break
-            
-            if (p1_team in used_teams or p2_team in used_teams or
-                p3_team in used_teams or p4_team in used_teams):
-                clash_found = True
-
-            if not clash_found:
-                used_teams.add(p1_team)
-                used_teams.add(p2_team)
-                used_teams.add(p3_team)
-                used_teams.add(p4_team)
-
-                path_name = chr(ord('A') + len(playoff_paths))
-                playoff_paths.append({
-                    'path_name': path_name,
-                    'semis': [
-                        (p1_team, p4_team),
-                        (p2_team, p3_team)
-                    ],
-                    'final_winner': None
-                })
-
-        except IndexError:
-            pass
-
+    playoff_paths = [{'path_name': chr(ord('A') + i), 'semis': semis, 'final_winner': None}
+                     for i, semis in enumerate(draw_playoff_paths(pots))]
 
     qualified_from_playoffs = set()
     for path in playoff_paths:
-        sf_winners = []
-        for home_team, away_team in path['semis']:
-            home_goals, away_goals = predict_match_outcome(home_team, away_team, match_type='knockout')
-            if home_goals > away_goals:
-                sf_winners.append(home_team)
-            else:
-                sf_winners.append(away_team)
-        
+        sf_winners = [knockout_winner(home_team, away_team) for home_team, away_team in path['semis']]
+
         if len(sf_winners) == 2:
             finalists = list(sf_winners)
             random.shuffle(finalists)
             final_home = finalists[0]
             final_away = finalists[1]
 
-            final_home_goals, final_away_goals = predict_match_outcome(final_home, final_away, match_type='knockout')
-
-            if final_home_goals > final_away_goals:
-                path['final_winner'] = final_home
-            else:
-                path['final_winner'] = final_away
-            
+            path['final_winner'] = knockout_winner(final_home, final_away)
             qualified_from_playoffs.add(path['final_winner'])
         else:
             pass
@@ -519,75 +419,206 @@ def simulate_playoffs(runners_up, nations_league_teams):
     return qualified_from_playoffs
 
 
-def simulate_tournament(initial_standings, all_fixtures, num_simulations=5000):
-    group_winner_counts = defaultdict(int)
-    runner_up_counts = defaultdict(int)
-    qualified_counts = defaultdict(int)
-    joint_qualification_count = 0 
-
-    specific_16_teams = set([
-        'Germany', 'France', 'Portugal', 'Spain',
-        'Netherlands', 'England', 'Italy', 'Belgium',
-        'Denmark', 'Croatia', 'Switzerland', 'Serbia',
-        'Ukraine', 'Sweden', 'Norway', 'Scotland'
-    ])
-
-    all_simulated_group_results = []
-    all_runners_up = []
-
-    for _ in tqdm(range(num_simulations), desc="Simulating World Cup Qualifiers"):
-        simulated_standings = {group: {team: data.copy() for team, data in teams.items()}
-                               for group, teams in initial_standings.items()}
-
-        for home_team, away_team, group in all_fixtures:
-            if home_team not in simulated_standings[group] or away_team not in simulated_standings[group]:
-                continue
-
-            home_goals, away_goals = predict_match_outcome(home_team, away_team, match_type='group_stage')
-
-            if home_goals > away_goals:
-                simulated_standings[group][home_team]['points'] += 3
-            elif home_goals < away_goals:
-                simulated_standings[group][away_team]['points'] += 3
-            else:
-                simulated_standings[group][home_team]['points'] += 1
-                simulated_standings[group][away_team]['points'] += 1
-
-            simulated_standings[group][home_team]['gd'] += (home_goals - away_goals)
-            simulated_standings[group][away_team]['gd'] += (away_goals - home_goals)
-            simulated_standings[group][home_team]['gs'] += home_goals
-            simulated_standings[group][away_team]['gs'] += away_goals
-            simulated_standings[group][home_team]['matches_played'] += 1
-            simulated_standings[group][away_team]['matches_played'] += 1
-
-        direct_qualifiers = set()
-        current_runners_up_list = []
-
-        for group, data in simulated_standings.items():
-            final_group_order = calculate_group_standings(data)
-            if final_group_order:
-                group_winner = final_group_order[0][0]
-                group_winner_counts[group_winner] += 1
-                direct_qualifiers.add(group_winner)
-
-                if len(final_group_order) > 1:
-                    runner_up = final_group_order[1][0]
-                    runner_up_counts[runner_up] += 1
-                    current_runners_up_list.append(runner_up)
-        
-        all_runners_up.append(current_runners_up_list)
-
-        nations_league_playoff_teams = determine_nations_league_playoff_teams(simulated_standings)
-        playoff_winners = simulate_playoffs(current_runners_up_list, nations_league_playoff_teams)
-        
-        all_qualified_this_sim = direct_qualifiers.union(playoff_winners)
-        for team in all_qualified_this_sim:
-            qualified_counts[team] += 1
-
-        if specific_16_teams.issubset(all_qualified_this_sim):
-            if len(all_qualified_this_sim) == len(specific_16_teams):
-                joint_qualification_count += 1
+# --- Vectorized Group Stage ---
+# Group standings for a block of simulations live in one (simulations x teams x STANDING_FIELDS)
+# int tensor, teams numbered group by group. Fixtures are compiled once into home/away team-index
+# arrays and a block's results are folded into the tensor with one-hot incidence matrices. Groups
+# are ranked with one stable argsort of a packed (points, gd, gs, strength) key laid out as
+# (groups x group size) slots, so full ties keep group order.
+SIM_BLOCK_SIZE = 1000 # Simulations drawn together
+STANDING_FIELDS = ['points', 'gd', 'gs', 'matches_played']
+POINTS, GD, GS, MP = range(len(STANDING_FIELDS))
+_KEY_BITS = 15 # Bits per packed field
+_GD_OFFSET = 1 << (_KEY_BITS - 1)
+
+def team_incidence(team_idx, num_teams):
+    """One-hot (fixtures x teams) matrix: entry [f, t] is 1 when team t plays in fixture f."""
+    onehot = np.zeros((len(team_idx), num_teams), dtype=np.int64)
+    onehot[np.arange(len(team_idx)), team_idx] = 1
+    return onehot
+
+def compile_group_stage(initial_standings, all_fixtures):
+    """
+    Compiles a standings dict and (home, away, group) fixtures into arrays. Returns a dict with
+    'teams' (names, group by group), 'slots' ((groups x max group size) team indices, -1 padding),
+    'standings' (teams x STANDING_FIELDS), 'home' / 'away' (fixture team indices) and their one-hot
+    incidence matrices, 'ratings', 'thresholds' (per fixture, from the pairwise table) and 'ordinals'
+    (dense ranks of team strength). Fixtures naming a team outside their group are dropped.
+    """
+    teams = [team for group_data in initial_standings.values() for team in group_data]
+    team_index = {(group, team): i for i, (group, team) in
+                  enumerate((group, team) for group, group_data in initial_standings.items() for team in group_data)}
+    slots = np.full((len(initial_standings), max(len(group_data) for group_data in initial_standings.values())), -1, dtype=np.intp)
+    for g, (group, group_data) in enumerate(initial_standings.items()):
+        slots[g, :len(group_data)] = [team_index[(group, team)] for team in group_data]
+    fixtures = [(team_index[(group, home_team)], team_index[(group, away_team)]) for home_team, away_team, group in all_fixtures
+                if (group, home_team) in team_index and (group, away_team) in team_index]
+    home, away = np.array(fixtures, dtype=np.intp).reshape(-1, 2).T
+    strengths = [team_strengths.get(team, 0) for team in teams]
+
+    # Rated pairings read the pairwise table; any unrated team falls back to on-the-fly thresholds
+    table = probability_table(team_strengths, UEFA_MATCH_MODEL)
+    table_rows = np.array([table['index'].get(team, -1) for team in teams], dtype=np.intp)
+    thresholds = None if (table_rows < 0).any() else table['cumulative'][table_rows[home], table_rows[away]]
+    return {
+        'teams': teams,
+        'slots': slots,
+        'standings': np.array([[data[field] for field in STANDING_FIELDS] for group_data in initial_standings.values()
+                               for data in group_data.values()], dtype=np.int64),
+        'home': home,
+        'away': away,
+        'home_onehot': team_incidence(home, len(teams)),
+        'away_onehot': team_incidence(away, len(teams)),
+        'ratings': np.array([team_strengths.get(team, 1000) for team in teams], dtype=float),
+        'thresholds': thresholds,
+        'ordinals': np.unique(strengths, return_inverse=True)[1].reshape(-1),
+    }
 
+def simulate_group_stage(group_stage, block_size, rng=None):
+    """Plays every compiled fixture for a block of simulations. Returns the (simulations x teams x fields) standings."""
+    home, away = group_stage['home'], group_stage['away']
+    home_onehot, away_onehot = group_stage['home_onehot'], group_stage['away_onehot']
+    home_goals, away_goals = sample_scorelines(group_stage['ratings'][home], group_stage['ratings'][away], UEFA_MATCH_MODEL,
+                                               rng=rng, size=(block_size, len(home)), thresholds=group_stage['thresholds'])
+
+    draws = (home_goals == away_goals).astype(np.int64)
+    home_points = np.where(home_goals > away_goals, 3, draws)
+    away_points = np.where(away_goals > home_goals, 3, draws)
+    delta = np.stack([home_points @ home_onehot + away_points @ away_onehot,
+                      (home_goals - away_goals) @ (home_onehot - away_onehot),
+                      home_goals @ home_onehot + away_goals @ away_onehot,
+                      np.broadcast_to((home_onehot + away_onehot).sum(axis=0), (block_size, len(group_stage['teams'])))],
+                     axis=-1)
+    return group_stage['standings'][None] + delta
+
+def rank_groups(group_stage, standings):
+    """Returns (simulations x groups x group size) team indices by final position; padding slots sort last as -1."""
+    key = ((standings[..., POINTS] << (3 * _KEY_BITS))
+           | ((standings[..., GD] + _GD_OFFSET) << (2 * _KEY_BITS))
+           | (standings[..., GS] << _KEY_BITS)
+           | group_stage['ordinals'])
+    slots = group_stage['slots']
+    slot_key = np.where(slots >= 0, key[:, np.maximum(slots, 0)], -1)
+    order = np.argsort(-slot_key, axis=-1, kind='stable')
+    return np.take_along_axis(np.broadcast_to(slots, order.shape), order, axis=-1)
+
+def nations_league_candidates(group_stage):
+    """Team indices of UNL_INTERIM_RANKING teams playing in the groups, in ranking order (first listing only)."""
+    team_index = {team: i for i, team in enumerate(group_stage['teams'])}
+    return np.array(list(dict.fromkeys(team_index[team] for team in UNL_INTERIM_RANKING if team in team_index)), dtype=np.intp)
+
+def nations_league_playoff_picks(candidates, top_two, num_needed=4):
+    """
+    Nations League playoff teams: for each simulation, the first num_needed candidates (in
+    UNL_INTERIM_RANKING order) not in its group top two. top_two is a (simulations x teams) bool array.
+    Returns a (simulations x candidates) bool mask of the picks.
+    """
+    available = ~top_two[:, candidates]
+    return available & (np.cumsum(available, axis=1) <= num_needed)
+
+# --- Streaming Results ---
+# A run keeps only fixed-size counters: per-team group wins, runner-up finishes, playoff wins and
+# final qualification, plus the SPECIFIC_16_TEAMS joint-qualification count. Blocks are added as
+# they finish, so memory does not grow with the number of simulations. Per-simulation records are
+# only produced when a dump file is given, and are streamed to it as JSON lines.
+SPECIFIC_16_TEAMS = [
+    'Germany', 'France', 'Portugal', 'Spain',
+    'Netherlands', 'England', 'Italy', 'Belgium',
+    'Denmark', 'Croatia', 'Switzerland', 'Serbia',
+    'Ukraine', 'Sweden', 'Norway', 'Scotland'
+]
+COUNTER_CATEGORIES = ['group_winner', 'runner_up', 'playoff', 'qualified']
+
+def new_uefa_counters(num_teams):
+    """Empty counters: runs, one int array per COUNTER_CATEGORIES entry and the joint-qualification count."""
+    counters = {category: np.zeros(num_teams, dtype=np.int64) for category in COUNTER_CATEGORIES}
+    counters['runs'] = 0
+    counters['joint_qualification'] = 0
+    return counters
+
+def add_block_to_counters(counters, group_winners, runners_up, playoff_winners, joint_teams):
+    """
+    Adds a block of simulations to the counters. group_winners and runners_up are (simulations x
+    groups) team indices, playoff_winners a (simulations x teams) bool array. joint_teams is the
+    bool team mask of SPECIFIC_16_TEAMS, or None if one of them is not in the groups.
+    """
+    block_size, num_teams = playoff_winners.shape
+    qualified = playoff_winners.copy()
+    np.put_along_axis(qualified, group_winners, True, axis=1) # Direct or playoff
+
+    counters['runs'] += block_size
+    counters['group_winner'] += np.bincount(group_winners.reshape(-1), minlength=num_teams)
+    counters['runner_up'] += np.bincount(runners_up.reshape(-1), minlength=num_teams)
+    counters['playoff'] += playoff_winners.sum(axis=0)
+    counters['qualified'] += qualified.sum(axis=0)
+    if joint_teams is not None:
+        # Exactly the 16 listed teams qualify
+        counters['joint_qualification'] += int((qualified == joint_teams).all(axis=1).sum())
+
+def counters_to_counts(counters, teams):
+    """Converts counters to {category: {team: count}}, dropping zero counts."""
+    counts = {category: {teams[t]: int(count) for t, count in enumerate(counters[category]) if count}
+              for category in COUNTER_CATEGORIES}
+    counts['joint_qualification'] = {'specific_16_teams': counters['joint_qualification']}
+    return counts
+
+def count_uefa_qualifiers(initial_standings, all_fixtures, num_simulations=5000, progress=True, dump_path=None):
+    """
+    Simulates the group stage and playoffs. Returns {category: {team: count}} for 'group_winner',
+    'runner_up', 'playoff', 'qualified' and 'joint_qualification'. With dump_path, every
+    simulation's group winners, runners-up, Nations League teams and playoff winners are also
+    written to that file as one JSON line.
+    """
+    build_probability_tables()
+    group_stage = compile_group_stage(initial_standings, all_fixtures)
+    teams = group_stage['teams']
+    team_index = {team: i for i, team in enumerate(teams)}
+    nl_candidates = nations_league_candidates(group_stage)
+    joint_teams = np.isin(teams, SPECIFIC_16_TEAMS) if set(SPECIFIC_16_TEAMS) <= set(teams) else None
+    counters = new_uefa_counters(len(teams))
+
+    dump_file = open(dump_path, 'w') if dump_path else None
+    try:
+        with tqdm(total=num_simulations, desc="Simulating World Cup Qualifiers", disable=not progress) as progress_bar:
+            for block_start in range(0, num_simulations, SIM_BLOCK_SIZE):
+                block_size = min(SIM_BLOCK_SIZE, num_simulations - block_start)
+
+                # Group stage for the whole block, then every group ranked at once
+                placed = rank_groups(group_stage, simulate_group_stage(group_stage, block_size))
+                group_winners, runners_up = placed[:, :, 0], placed[:, :, 1]
+
+                top_two = np.zeros((block_size, len(teams)), dtype=bool)
+                np.put_along_axis(top_two, placed[:, :, :2].reshape(block_size, -1), True, axis=1)
+                nl_picks = nations_league_playoff_picks(nl_candidates, top_two)
+
+                playoff_winners = np.zeros((block_size, len(teams)), dtype=bool)
+                for sim in range(block_size):
+                    current_runners_up_list = [teams[team] for team in runners_up[sim]]
+                    nations_league_playoff_teams = [teams[team] for team in nl_candidates[nl_picks[sim]]]
+                    qualified_from_playoffs = simulate_playoffs(current_runners_up_list, nations_league_playoff_teams)
+                    playoff_winners[sim, [team_index[team] for team in qualified_from_playoffs]] = True
+
+                    if dump_file:
+                        dump_file.write(json.dumps({
+                            'simulation': block_start + sim,
+                            'group_winners': [teams[team] for team in group_winners[sim]],
+                            'runners_up': current_runners_up_list,
+                            'nations_league': nations_league_playoff_teams,
+                            'playoff_winners': sorted(qualified_from_playoffs),
+                        }) + '\n')
+
+                add_block_to_counters(counters, group_winners, runners_up, playoff_winners, joint_teams)
+                progress_bar.update(block_size)
+    finally:
+        if dump_file:
+            dump_file.close()
+
+    return counters_to_counts(counters, teams)
+
+def print_uefa_results(counts, num_simulations):
+    group_winner_counts = counts['group_winner']
+    runner_up_counts = counts['runner_up']
+    qualified_counts = counts['qualified']
 
     print(f"\n--- Monte Carlo Simulation Results ({num_simulations} runs) ---")
     print("\nProbability of winning group (Direct Qualification):")
@@ -602,6 +633,11 @@ def simulate_tournament(initial_standings, all_fixtures, num_simulations=5000):
         if num_simulations > 0:
             print(f"{team}: {wins / num_simulations:.2%}")
 
+    print("\nProbability of qualifying through the playoffs:")
+    sorted_playoff = sorted(counts['playoff'].items(), key=lambda item: (-item[1], item[0]))
+    for team, wins in sorted_playoff:
+        print(f"{team}: {wins / num_simulations:.2%}")
+
     print("\nOverall Probability of Qualification (Direct or Playoff):")
     overall_probabilities = {}
     for team, qualified_times in qualified_counts.items():
@@ -612,13 +648,26 @@ def simulate_tournament(initial_standings, all_fixtures, num_simulations=5000):
     for team, prob in sorted_qualified:
         print(f"{team}: {prob:.2%}")
 
-    if num_simulations > 0 and len(specific_16_teams) == 16:
-        joint_prob = joint_qualification_count / num_simulations
-    elif num_simulations > 0:
-        joint_prob
-    else:
-        joint_prob = 0.0
+    if num_simulations > 0:
+        joint_prob = counts['joint_qualification']['specific_16_teams'] / num_simulations
+        print(f"\nProbability that exactly the {len(SPECIFIC_16_TEAMS)} listed teams qualify: {joint_prob:.2%}")
+
+def simulate_tournament(initial_standings, all_fixtures, num_simulations=5000, dump_path=None):
+    counts = count_uefa_qualifiers(initial_standings, all_fixtures, num_simulations, dump_path=dump_path)
+    print_uefa_results(counts, num_simulations)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="UEFA World Cup 2026 qualifying simulations")
+    parser.add_argument('--simulations', type=int, default=100, help='Number of simulations')
+    parser.add_argument('--dump', dest='dump_path', default=None,
+                        help='Write every simulation\'s group and playoff results to this file as JSON lines')
+    return parser.parse_args()
+
+def count_qualification(num_simulations=5000, progress=True):
+    """Runner hook (see run_qualifiers.py): counts for the current standings and remaining fixtures."""
+    return count_uefa_qualifiers(current_standings, remaining_fixtures, num_simulations, progress)
 
 
 if __name__ == "__main__":
-    simulate_tournament(current_standings, remaining_fixtures, num_simulations=100)
\ No newline at end of file
+    args = parse_args()
+    simulate_tournament(current_standings, remaining_fixtures, num_simulations=args.simulations, dump_path=args.dump_path)
\ No newline at end of file